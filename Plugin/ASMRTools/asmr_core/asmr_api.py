@@ -7,25 +7,97 @@ ASMR API Client
 
 import asyncio
 import json
+import logging
+import random
+import ssl
+import time
 from typing import Any, Dict, List, Optional, TypeVar
-from aiohttp import ClientConnectorError, ClientSession
+from urllib.parse import quote
+from aiohttp import ClientConnectionError, ClientError, ClientPayloadError, ClientSession
 from aiohttp.connector import TCPConnector
 
+try:
+    import ijson
+except ImportError:  # ijson为可选依赖
+    ijson = None
+
+from . import json_utils
+from .cache import ResponseCache, response_cache
 from .config import ASMRConfig
 
 T = TypeVar("T", bound="ASMRAPIClient")
 
+logger = logging.getLogger(__name__)
+
+# 重试退避参数（秒）
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+# 可恢复的HTTP状态码，其余非200状态直接失败
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+# 可恢复的异常：连接失败/重置、服务端断开、响应体不完整、超时
+RETRYABLE_ERRORS = (ClientConnectionError, ClientPayloadError, asyncio.TimeoutError)
+# 不重试的失败：其他客户端错误和响应体解析错误
+FATAL_ERRORS = (ClientError, ValueError) + ((ijson.JSONError,) if ijson is not None else ())
+
+# 幂等GET接口的缓存时间（秒）
+WORK_INFO_TTL = 3600
+WORK_TRACKS_TTL = 1800
+SEARCH_TTL = 300
+
+# 推荐/热门列表的stale-while-revalidate时间窗口（秒）
+RECOMMEND_FRESH_TTL = 60
+RECOMMEND_STALE_TTL = 600
+_recommend_cache = ResponseCache(maxsize=64)
+
+# 跳过证书验证的SSL上下文，进程内只创建一次
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
+def backoff_delay(attempt: int) -> float:
+    """计算第attempt次重试的等待时间（指数退避 + 随机抖动）"""
+    delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random() * RETRY_JITTER)
+    return min(delay, RETRY_MAX_DELAY)
+
+async def _read_json(resp, incremental: bool = False) -> Any:
+    """读取JSON响应；incremental且安装了ijson时直接从响应流增量解析，不先缓冲整个响应体"""
+    if incremental and ijson is not None:
+        async for value in ijson.items(resp.content, "", use_float=True):
+            return value
+    return json_utils.loads(await resp.read())
+
+def _split_filter(value) -> List[str]:
+    """将逗号分隔的字符串或列表统一为去除空白的列表"""
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    return [item.strip() for item in items]
+
+def clean_work_id(work_id: str) -> str:
+    """移除RJ/VJ/BJ前缀，只保留数字部分"""
+    clean_id = work_id.upper()
+    if clean_id[:2] in ('RJ', 'VJ', 'BJ'):
+        clean_id = clean_id[2:]
+    return clean_id
+
 class ASMRAPIClient:
     """ASMR.one API客户端"""
     
-    def __init__(self, config: ASMRConfig):
+    def __init__(self, config: ASMRConfig, cache: Optional[ResponseCache] = None,
+                 session: Optional[ClientSession] = None):
         self.config = config
+        self.cache = cache if cache is not None else response_cache
         self.base_api_url = "https://api.asmr-200.com/api/"
         self.headers = {
             "User-Agent": "ASMRTools-VCP (https://github.com/lioensky/VCPToolBox)",
         }
-        self._session: Optional[ClientSession] = None
+        # 外部传入的会话由调用方负责关闭
+        self._session: Optional[ClientSession] = session
+        self._owns_session = session is None
         self.recommender_uuid: str = ""
+        self.is_authenticated = False
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
         
         # 设置API频道
         if config.api_channel:
@@ -33,21 +105,35 @@ class ASMRAPIClient:
 
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        import ssl
-        # 创建SSL上下文，跳过证书验证
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        
-        connector = TCPConnector(limit=10, ssl=ssl_context)
-        self._session = ClientSession(connector=connector)
-        await self.login()
+        if self._session is None or self._session.closed:
+            self._session = self.create_session(self.config)
+            self._owns_session = True
+        self.is_authenticated = await self.login()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
-        if self._session:
+        # 会话即将关闭，未完成的后台刷新无法继续
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_tasks.clear()
+        if self._session and self._owns_session:
             await self._session.close()
+            self._session = None
+        self.cache.log_stats()
+
+    @staticmethod
+    def create_session(config: ASMRConfig) -> ClientSession:
+        """创建可在多个客户端之间共享的会话"""
+        # 连接池上限由配置决定，避免并发请求被串行化
+        connector = TCPConnector(
+            limit=config.http_limit,
+            limit_per_host=config.http_limit_per_host,
+            ssl=_SSL_CTX,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+        )
+        return ClientSession(connector=connector)
 
     async def login(self) -> bool:
         """登录ASMR.one"""
@@ -61,7 +147,7 @@ class ASMRAPIClient:
                 if resp.status != 200:
                     return False
                     
-                resp_json = await resp.json()
+                resp_json = json_utils.loads(await resp.read())
                 token = resp_json["token"]
                 self.headers.update({
                     "Authorization": f"Bearer {token}",
@@ -72,82 +158,107 @@ class ASMRAPIClient:
             print(f"Login failed: {e}")
             return False
 
-    async def get(self, route: str, params: Optional[Dict] = None, max_retry: int = 3) -> Optional[Any]:
-        """GET请求"""
-        retry = 0
-        while retry <= max_retry:
+    async def _request(self, method: str, route: str, max_retry: int = 3,
+                       incremental: bool = False, **kwargs) -> Optional[Any]:
+        """带指数退避重试的请求，仅对可恢复错误(连接错误、超时、408/425/429/5xx)重试，其余失败(含JSON解析错误)返回None"""
+        attempt = 0
+        while True:
             try:
-                async with self._session.get(
+                async with self._session.request(
+                    method,
                     self.base_api_url + route,
                     headers=self.headers,
                     proxy=self.config.proxy,
-                    params=params,
+                    **kwargs,
                 ) as resp:
                     if resp.status == 200:
-                        return await resp.json()
-                    else:
-                        print(f"Request failed with status {resp.status} for route: {route}")
+                        return await _read_json(resp, incremental)
+                    if resp.status not in RETRYABLE_STATUS:
+                        logger.warning("Request failed with status %s for route: %s", resp.status, route)
                         return None
-            except Exception as e:
-                print(f"Request {route} failed: {e}")
-                if retry >= max_retry:
-                    return None
-                retry += 1
-                await asyncio.sleep(2)
-        return None
+                    logger.warning("Request %s got retryable status %s", route, resp.status)
+            except RETRYABLE_ERRORS as e:
+                logger.warning("Request %s failed: %r", route, e)
+            except FATAL_ERRORS as e:
+                logger.warning("Request %s failed without retry: %r", route, e)
+                return None
+
+            if attempt >= max_retry:
+                return None
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    async def get(self, route: str, params: Optional[Dict] = None, max_retry: int = 3,
+                  incremental: bool = False) -> Optional[Any]:
+        """GET请求"""
+        return await self._request("GET", route, max_retry=max_retry, incremental=incremental, params=params)
 
     async def post(self, route: str, data: Optional[Dict] = None, max_retry: int = 3) -> Optional[Any]:
         """POST请求"""
-        retry = 0
-        while retry <= max_retry:
-            try:
-                async with self._session.post(
-                    self.base_api_url + route,
-                    headers=self.headers,
-                    proxy=self.config.proxy,
-                    json=data,
-                ) as resp:
-                    if resp.status == 200:
-                        return await resp.json()
-                    else:
-                        print(f"Request failed with status {resp.status}")
-                        return None
-            except Exception as e:
-                print(f"Request {route} failed: {e}")
-                if retry >= max_retry:
-                    return None
-                retry += 1
-                await asyncio.sleep(2)
-        return None
+        return await self._request("POST", route, max_retry=max_retry, json=data)
+
+    async def cached_get(self, route: str, ttl: float, params: Optional[Dict] = None,
+                         incremental: bool = False) -> Optional[Any]:
+        """带缓存的GET请求，仅缓存成功的响应"""
+        key = self.cache.make_key(route, params)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        result = await self.get(route, params, incremental=incremental)
+        if result is not None:
+            self.cache.set(key, result, ttl)
+        return result
+
+    async def stale_while_revalidate_post(self, route: str, data: Dict) -> Optional[Any]:
+        """带stale-while-revalidate缓存的POST请求：数据过期但仍在陈旧窗口内时先返回旧数据，并在后台刷新"""
+        key = _recommend_cache.make_key(route, data)
+        entry = _recommend_cache.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            if time.monotonic() - fetched_at < RECOMMEND_FRESH_TTL:
+                return value
+            if key not in self._refresh_tasks:
+                task = asyncio.create_task(self._revalidate_in_background(key, route, data))
+                self._refresh_tasks[key] = task
+                task.add_done_callback(lambda _t, k=key: self._refresh_tasks.pop(k, None))
+            return value
+        
+        return await self._revalidate(key, route, data)
+
+    async def _revalidate_in_background(self, key: str, route: str, data: Dict) -> None:
+        """后台刷新，失败时保留旧数据"""
+        try:
+            await self._revalidate(key, route, data)
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %r", route, e)
+
+    async def _revalidate(self, key: str, route: str, data: Dict) -> Optional[Any]:
+        """请求最新数据并写入缓存"""
+        result = await self.post(route, data)
+        if result is not None:
+            _recommend_cache.set(key, (time.monotonic(), result), RECOMMEND_STALE_TTL)
+        return result
+
+    def invalidate(self, work_id: str) -> None:
+        """使指定作品的缓存失效"""
+        clean_id = clean_work_id(work_id)
+        self.cache.delete(self.cache.make_key(f"work/{clean_id}"))
+        self.cache.delete(self.cache.make_key(f"tracks/{clean_id}", {"v": 2}))
 
     async def search_works(self, keyword: str, **filters) -> List[Dict]:
         """搜索作品"""
         # 构建搜索内容
-        search_filters = []
-        
-        # 添加关键词
-        if keyword:
-            search_filters.append(keyword)
-            
-        # 添加标签过滤器
-        if "tags" in filters and filters["tags"]:
-            tags = filters["tags"].split(",") if isinstance(filters["tags"], str) else filters["tags"]
-            for tag in tags:
-                search_filters.append(f"$tag:{tag.strip()}$")
-                
-        if "no_tags" in filters and filters["no_tags"]:
-            no_tags = filters["no_tags"].split(",") if isinstance(filters["no_tags"], str) else filters["no_tags"]
-            for tag in no_tags:
-                search_filters.append(f"$-tag:{tag.strip()}$")
-                
-        # 添加其他过滤器
-        if "circle" in filters and filters["circle"]:
-            search_filters.append(f"$circle:{filters['circle']}$")
-        if "age" in filters and filters["age"]:
-            search_filters.append(f"$age:{filters['age']}$")
+        parts = [keyword] if keyword else []
+        parts.extend(f"$tag:{tag}$" for tag in _split_filter(filters.get("tags")))
+        parts.extend(f"$-tag:{tag}$" for tag in _split_filter(filters.get("no_tags")))
+        if filters.get("circle"):
+            parts.append(f"$circle:{filters['circle']}$")
+        if filters.get("age"):
+            parts.append(f"$age:{filters['age']}$")
             
-        # 构建搜索字符串
-        search_content = " ".join(search_filters).replace("/", "%2F")
+        # 构建URL安全的搜索字符串
+        search_content = quote(" ".join(parts), safe="$:")
         
         # 搜索参数
         params = {
@@ -158,19 +269,16 @@ class ASMRAPIClient:
         }
         
         # 使用搜索端点
-        result = await self.get(f"search/{search_content}", params)
+        result = await self.cached_get(f"search/{search_content}", SEARCH_TTL, params)
         if result and "works" in result:
             return result["works"]
         return []
 
     async def get_work_info(self, work_id: str) -> Optional[Dict]:
         """获取作品详细信息"""
-        # 移除RJ/VJ/BJ前缀，只保留数字
-        clean_id = work_id.upper()
-        if clean_id.startswith(('RJ', 'VJ', 'BJ')):
-            clean_id = clean_id[2:]
+        clean_id = clean_work_id(work_id)
             
-        result = await self.get(f"work/{clean_id}")
+        result = await self.cached_get(f"work/{clean_id}", WORK_INFO_TTL)
         return result
 
     async def get_recommendations(self, page: int = 1) -> List[Dict]:
@@ -183,7 +291,7 @@ class ASMRAPIClient:
             "order": "create_date",
             "sort": "desc"
         }
-        result = await self.post("recommender/recommend-for-user", data)
+        result = await self.stale_while_revalidate_post("recommender/recommend-for-user", data)
         if result and "works" in result:
             return result["works"]
         return []
@@ -198,18 +306,17 @@ class ASMRAPIClient:
             "order": "create_date",
             "sort": "desc"
         }
-        result = await self.post("recommender/popular", data)
+        result = await self.stale_while_revalidate_post("recommender/popular", data)
         if result and "works" in result:
             return result["works"]
         return []
 
     async def get_work_tracks(self, work_id: str) -> List[Dict]:
         """获取作品音轨列表"""
-        clean_id = work_id.upper()
-        if clean_id.startswith(('RJ', 'VJ', 'BJ')):
-            clean_id = clean_id[2:]
+        clean_id = clean_work_id(work_id)
             
-        result = await self.get(f"tracks/{clean_id}", params={"v": 2})
+        # 音轨树可能很大，安装了ijson时从响应流增量解析
+        result = await self.cached_get(f"tracks/{clean_id}", WORK_TRACKS_TTL, params={"v": 2}, incremental=True)
         if result:
             if isinstance(result, list):
                 return result
@@ -3,34 +3,110 @@
 """
 Async Handler - Fixed Version
 处理异步下载请求的核心模块 - 修复版本
-使用完全同步的方法避免事件循环问题
+下载任务运行在独立线程的事件循环中，API请求复用ASMRAPIClient，文件下载在线程池中同步执行
 """
 
-import json
+import asyncio
 import os
 import sys
 import threading
 import time
+import uuid
+import atexit
 import requests
+import urllib3
 from pathlib import Path
 from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from . import json_utils
+from .asmr_api import ASMRAPIClient
 from .config import ASMRConfig
 from .progress_manager import ProgressManager
 
-def get_file_size_from_structure(file_structure: Dict, filename: str) -> int:
-    """从文件结构中递归查找文件大小"""
-    def search_structure(structure):
-        for key, value in structure.items():
-            if value.get("type") == "file" and key == filename:
-                return value.get("size", 0)
-            elif value.get("type") == "folder" and "children" in value:
-                size = search_structure(value["children"])
-                if size > 0:
-                    return size
-        return 0
-    
-    return search_structure(file_structure)
+# 共享会话关闭了证书校验，只需屏蔽一次证书警告
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# 进程内共享的HTTP会话，复用TLS连接
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+
+def get_shared_session() -> requests.Session:
+    """获取进程内共享的requests会话（线程安全的懒加载单例）"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=50,
+                pool_maxsize=100,
+                max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504]),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # 在会话上统一关闭证书校验，避免每次请求单独传入verify参数
+            session.verify = False
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            })
+            _shared_session = session
+        return _shared_session
+
+def _close_shared_session():
+    """进程退出时关闭共享会话"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
+
+atexit.register(_close_shared_session)
+
+# 后台下载任务共用的事件循环
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+_pending_tasks = 0
+
+def _run_background_loop(loop: asyncio.AbstractEventLoop):
+    """在后台线程中运行事件循环，直到所有任务完成"""
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+def _on_background_task_done(_future):
+    """任务结束时计数，全部完成后停止事件循环让进程正常退出"""
+    global _background_loop, _pending_tasks
+    with _background_lock:
+        _pending_tasks -= 1
+        if _pending_tasks == 0 and _background_loop is not None:
+            _background_loop.call_soon_threadsafe(_background_loop.stop)
+            _background_loop = None
+
+def submit_background_task(coro):
+    """将协程提交到后台事件循环线程执行"""
+    global _background_loop, _pending_tasks
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            loop_thread = threading.Thread(
+                target=_run_background_loop,
+                args=(_background_loop,),
+                name="asmr-download-loop",
+            )
+            loop_thread.daemon = False  # 不设置为守护线程，让主进程等待
+            loop_thread.start()
+        _pending_tasks += 1
+        future = asyncio.run_coroutine_threadsafe(coro, _background_loop)
+    future.add_done_callback(_on_background_task_done)
+    return future
+
+def _post_callback(callback_url: str, payload: Dict[str, Any]) -> None:
+    """发送回调请求"""
+    response = requests.post(callback_url, json=payload, timeout=30)
+    response.raise_for_status()
 
 def handle_async_download(request_data: Dict[str, Any]):
     """处理异步下载请求"""
@@ -41,8 +117,7 @@ def handle_async_download(request_data: Dict[str, Any]):
                 "status": "error",
                 "error": "Work ID is required for download"
             }
-            print(json.dumps(result, ensure_ascii=False))
-            sys.stdout.flush()
+            json_utils.emit(result)
             return
         
         # 获取目标路径参数（可选）
@@ -52,7 +127,6 @@ def handle_async_download(request_data: Dict[str, Any]):
         quality = 'best'
         
         # 生成唯一的任务ID
-        import uuid
         task_id = str(uuid.uuid4())
         
         # 构建下载范围描述
@@ -70,48 +144,42 @@ def handle_async_download(request_data: Dict[str, Any]):
             "messageForAI": f"ASMR下载任务已提交，任务ID为 {task_id}。请告知用户耐心等待，下载结果将通过通知推送。"
         }
         
-        print(json.dumps(initial_response, ensure_ascii=False))
-        sys.stdout.flush()
+        json_utils.emit(initial_response)
         
         # 启动后台下载线程
         callback_base_url = os.getenv("CALLBACK_BASE_URL")
         plugin_name_for_callback = os.getenv("PLUGIN_NAME_FOR_CALLBACK")
         
         # 总是启动后台任务，即使没有callback配置
-        download_thread = threading.Thread(
-            target=background_download_task,
-            args=(task_id, work_id, quality, callback_base_url, plugin_name_for_callback, target_path)
+        future = submit_background_task(
+            background_download_task(task_id, work_id, quality, callback_base_url, plugin_name_for_callback, target_path)
         )
-        download_thread.daemon = False  # 不设置为守护线程，让主进程等待
-        download_thread.start()
         
         if not callback_base_url or not plugin_name_for_callback:
             print("Warning: Callback configuration missing", file=sys.stderr)
         
-        # 给后台线程一些时间启动
-        time.sleep(1)
+        # 等待后台任务结束：主线程退出后解释器会关闭默认线程池，
+        # 而事件循环中的DNS解析和run_in_executor都依赖它
+        future.result()
             
     except Exception as e:
         result = {
             "status": "error",
             "error": f"Failed to start download task: {str(e)}"
         }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.stdout.flush()
+        json_utils.emit(result)
 
-def background_download_task(task_id: str, work_id: str, quality: str, callback_base_url: Optional[str], plugin_name: Optional[str], target_path: str = ""):
-    """后台下载任务 - 完全同步版本"""
+async def background_download_task(task_id: str, work_id: str, quality: str, callback_base_url: Optional[str], plugin_name: Optional[str], target_path: str = ""):
+    """后台下载任务"""
     try:
-        # 运行同步下载
-        result = perform_download_sync(task_id, work_id, quality, target_path)
+        result = await perform_download(task_id, work_id, quality, target_path)
         
         # 发送回调（如果配置了的话）
         if callback_base_url and plugin_name:
             callback_url = f"{callback_base_url}/{plugin_name}/{task_id}"
             
             try:
-                response = requests.post(callback_url, json=result, timeout=30)
-                response.raise_for_status()
+                await asyncio.get_running_loop().run_in_executor(None, _post_callback, callback_url, result)
                 print(f"Callback sent successfully for task {task_id}", file=sys.stderr)
             except requests.exceptions.RequestException as e:
                 print(f"Failed to send callback for task {task_id}: {e}", file=sys.stderr)
@@ -131,15 +199,14 @@ def background_download_task(task_id: str, work_id: str, quality: str, callback_
         if callback_base_url and plugin_name:
             callback_url = f"{callback_base_url}/{plugin_name}/{task_id}"
             try:
-                response = requests.post(callback_url, json=error_result, timeout=30)
-                response.raise_for_status()
+                await asyncio.get_running_loop().run_in_executor(None, _post_callback, callback_url, error_result)
             except:
                 pass
         
         print(f"Download task {task_id} failed: {e}", file=sys.stderr)
 
-def perform_download_sync(task_id: str, work_id: str, quality: str, target_path: str = "") -> Dict[str, Any]:
-    """执行实际的下载任务 - 完全同步版本"""
+async def perform_download(task_id: str, work_id: str, quality: str, target_path: str = "") -> Dict[str, Any]:
+    """执行实际的下载任务"""
     progress_manager = None
     
     try:
@@ -165,97 +232,64 @@ def perform_download_sync(task_id: str, work_id: str, quality: str, target_path:
         # 确保下载目录存在
         config.ensure_download_path()
         
-        # 使用同步方式获取作品信息
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        })
-        
-        # 登录获取token
-        login_url = "https://api.asmr-200.com/api/auth/me"
-        if config.api_channel:
-            login_url = f"https://{config.api_channel}/api/auth/me"
-        
-        login_data = {
-            "name": config.username,
-            "password": config.password
-        }
-        
-        # 登录
-        response = session.post(login_url, json=login_data, verify=False)
-        if response.status_code != 200:
-            if progress_manager:
-                progress_manager.update_failed(task_id, f"Login failed: {response.status_code}")
-            return {
-                "requestId": task_id,
-                "status": "Failed",
-                "pluginName": "ASMRTools",
-                "reason": f"Login failed: {response.status_code}",
-                "message": f"ASMR作品下载失败 (ID: {task_id}): 登录失败"
-            }
-        
-        resp_json = response.json()
-        token = resp_json["token"]
-        session.headers.update({
-            "Authorization": f"Bearer {token}",
-        })
-        
-        # 获取作品信息
-        clean_work_id = work_id.replace('RJ', '').replace('VJ', '').replace('BJ', '')
-        work_url = f"https://api.asmr-200.com/api/work/{clean_work_id}"
-        if config.api_channel:
-            work_url = f"https://{config.api_channel}/api/work/{clean_work_id}"
-        
-        work_response = session.get(work_url, verify=False)
-        if work_response.status_code != 200:
-            if progress_manager:
-                progress_manager.update_failed(task_id, f"Work not found: {work_id}")
-            return {
-                "requestId": task_id,
-                "status": "Failed",
-                "pluginName": "ASMRTools",
-                "reason": f"Work not found: {work_id}",
-                "message": f"ASMR作品下载失败 (ID: {task_id}): 作品不存在"
-            }
-        
-        work_info = work_response.json()
-        
-        # 获取音轨列表
-        tracks_url = f"https://api.asmr-200.com/api/tracks/{clean_work_id}?v=2"
-        if config.api_channel:
-            tracks_url = f"https://{config.api_channel}/api/tracks/{clean_work_id}?v=2"
-        
-        tracks_response = session.get(tracks_url, verify=False)
-        if tracks_response.status_code != 200:
-            if progress_manager:
-                progress_manager.update_failed(task_id, "No tracks found for this work", work_info)
-            return {
-                "requestId": task_id,
-                "status": "Failed",
-                "pluginName": "ASMRTools",
-                "reason": "No tracks found for this work",
-                "message": f"ASMR作品下载失败 (ID: {task_id}): 没有找到音轨文件"
-            }
-        
-        tracks = tracks_response.json()
+        async with ASMRAPIClient(config) as client:
+            if not client.is_authenticated:
+                if progress_manager:
+                    progress_manager.update_failed(task_id, "Login failed")
+                return {
+                    "requestId": task_id,
+                    "status": "Failed",
+                    "pluginName": "ASMRTools",
+                    "reason": "Login failed",
+                    "message": f"ASMR作品下载失败 (ID: {task_id}): 登录失败"
+                }
+            
+            # 并发获取作品信息和音轨列表，复用同一连接池
+            work_info, tracks = await asyncio.gather(
+                client.get_work_info(work_id),
+                client.get_work_tracks(work_id),
+            )
+            if not work_info:
+                if progress_manager:
+                    progress_manager.update_failed(task_id, f"Work not found: {work_id}")
+                return {
+                    "requestId": task_id,
+                    "status": "Failed",
+                    "pluginName": "ASMRTools",
+                    "reason": f"Work not found: {work_id}",
+                    "message": f"ASMR作品下载失败 (ID: {task_id}): 作品不存在"
+                }
+            
+            if not tracks:
+                if progress_manager:
+                    progress_manager.update_failed(task_id, "No tracks found for this work", work_info)
+                return {
+                    "requestId": task_id,
+                    "status": "Failed",
+                    "pluginName": "ASMRTools",
+                    "reason": "No tracks found for this work",
+                    "message": f"ASMR作品下载失败 (ID: {task_id}): 没有找到音轨文件"
+                }
+            
+            # 文件下载沿用已登录的token
+            session = get_shared_session()
+            session.headers["Authorization"] = client.headers["Authorization"]
         
         # 使用同步下载器
         from .sync_downloader_simple import SyncDownloaderSimple
         
         downloader = SyncDownloaderSimple(config, session)
         
-        # 提取所有文件信息
-        all_files = downloader._extract_files_from_tracks(tracks)
+        # 一次遍历构建文件结构、文件名到大小的索引和完整文件列表
+        size_index = {}
+        extracted_files = []
+        file_structure = downloader._build_file_structure(tracks, size_index=size_index, files=extracted_files)
         
-        # 如果指定了目标路径，过滤文件
-        if target_path:
-            all_files = downloader._filter_files_by_path(all_files, target_path)
+        # 如果指定了目标路径则过滤，选出的列表直接交给download_tracks，不再重复遍历
+        all_files = downloader._select_files(tracks, target_path, extracted=extracted_files)
         
         total_files = len(all_files)
         
-        # 构建文件结构信息
-        file_structure = downloader._build_file_structure(tracks)
-        
         # 更新准备状态
         if progress_manager:
             scope_msg = f" (指定路径: {target_path})" if target_path else ""
@@ -265,37 +299,39 @@ def perform_download_sync(task_id: str, work_id: str, quality: str, target_path:
         total_bytes = 0
         file_sizes = {}
         for file_info in all_files:
-            # 从文件结构中获取文件大小
-            file_size = get_file_size_from_structure(file_structure, file_info.get("filename", ""))
-            file_sizes[file_info.get("filename", "")] = file_size
+            filename = file_info.get("filename", "")
+            file_size = size_index.get(filename, 0)
+            file_sizes[filename] = file_size
             total_bytes += file_size
         
         # 进度回调函数
         completed_files = 0
         current_file = ""
         completed_files_list = []
+        completed_bytes = 0  # 已完成文件的累计大小
+        active_bytes = {}  # 正在下载的文件 -> 已下载字节数（多个文件并发下载）
         downloaded_bytes = 0
+        last_update_ts = 0.0
+        last_reported_percent = -1.0
         
         def progress_callback(progress_info):
-            nonlocal completed_files, current_file, completed_files_list, downloaded_bytes
+            nonlocal completed_files, current_file, completed_bytes, downloaded_bytes
+            nonlocal last_update_ts, last_reported_percent
             
             # 更新当前文件信息
             if progress_info.get("status") in ["complete", "skipped"]:
                 completed_files += 1
                 filename = progress_info.get("filename", "")
+                active_bytes.pop(filename, None)
                 if filename and filename not in completed_files_list:
                     completed_files_list.append(filename)
                     # 累加已下载的字节数
-                    downloaded_bytes += file_sizes.get(filename, 0)
+                    completed_bytes += file_sizes.get(filename, 0)
+                downloaded_bytes = completed_bytes + sum(active_bytes.values())
             elif progress_info.get("status") == "active":
-                # 对于正在下载的文件，计算部分下载的字节数
-                filename = progress_info.get("filename", "")
-                completed_length = progress_info.get("completed_length", 0)
-                
-                # 计算已完成文件的总大小 + 当前文件的已下载部分
-                temp_downloaded_bytes = sum(file_sizes.get(f, 0) for f in completed_files_list)
-                temp_downloaded_bytes += completed_length
-                downloaded_bytes = temp_downloaded_bytes
+                # 已完成文件的总大小 + 所有下载中文件的已下载部分
+                active_bytes[progress_info.get("filename", "")] = progress_info.get("completed_length", 0)
+                downloaded_bytes = completed_bytes + sum(active_bytes.values())
             
             if progress_info.get("filename"):
                 current_file = progress_info["filename"]
@@ -307,6 +343,15 @@ def perform_download_sync(task_id: str, work_id: str, quality: str, target_path:
                 # 如果没有大小信息，回退到文件数量计算
                 overall_progress = (completed_files / total_files) * 100 if total_files > 0 else 0
             
+            # 按配置的时间间隔或进度变化节流，文件完成时总是更新
+            now = time.monotonic()
+            if (progress_info.get("status") not in ("complete", "skipped", "failed")
+                    and now - last_update_ts < config.progress_update_interval
+                    and abs(overall_progress - last_reported_percent) < 1.0):
+                return
+            last_update_ts = now
+            last_reported_percent = overall_progress
+            
             # 更新进度
             if progress_manager:
                 progress_manager.update_download_progress(
@@ -323,10 +368,10 @@ def perform_download_sync(task_id: str, work_id: str, quality: str, target_path:
                 )
         
         # 开始下载
-        download_result = downloader.download_tracks(tracks, work_info, progress_callback, target_path)
-        
-        # 关闭session
-        session.close()
+        # 文件下载是阻塞IO，放到线程池中执行，避免阻塞事件循环
+        download_result = await asyncio.get_running_loop().run_in_executor(
+            None, downloader.download_tracks, tracks, work_info, progress_callback, target_path, all_files
+        )
         
         # 更新最终状态
         if download_result["success_count"] > 0:
@@ -387,4 +432,4 @@ def perform_download_sync(task_id: str, work_id: str, quality: str, target_path:
             "pluginName": "ASMRTools",
             "reason": str(e),
             "message": f"ASMR作品下载失败 (ID: {task_id}): {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Response Cache
+API响应的TTL + LRU缓存
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """带过期时间的LRU缓存，按(route, params)缓存幂等请求的响应"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(route: str, params: Optional[Dict] = None) -> str:
+        """根据路由和参数生成缓存键"""
+        raw = f"{route}|{json.dumps(params, sort_keys=True)}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，过期或不存在时返回None"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """删除单个缓存条目"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+
+    def hit_rate(self) -> float:
+        """缓存命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def log_stats(self) -> None:
+        """以debug级别记录命中统计"""
+        logger.debug(
+            "Response cache: %d hits, %d misses (%.1f%% hit rate, %d entries)",
+            self.hits, self.misses, self.hit_rate() * 100, len(self._data),
+        )
+
+# 进程内共享的响应缓存
+response_cache = ResponseCache()
@@ -5,26 +5,35 @@ ASMR Tools Configuration
 基于环境变量的配置管理
 """
 
+import functools
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-def load_env_file(env_file_path: str):
-    """加载.env文件到环境变量"""
-    if not os.path.exists(env_file_path):
-        return
-    
+@functools.lru_cache(maxsize=8)
+def _parse_env_file(env_file_path: str, mtime: float) -> Tuple[Tuple[str, str], ...]:
+    """解析.env文件，按(路径, 修改时间)缓存，文件变更后自动重新解析"""
+    items = []
     with open(env_file_path, 'r', encoding='utf-8') as f:
         for line in f:
             line = line.strip()
             if line and not line.startswith('#') and '=' in line:
                 key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                # 只有当环境变量不存在时才设置
-                if key not in os.environ:
-                    os.environ[key] = value
+                items.append((key.strip(), value.strip()))
+    return tuple(items)
+
+def load_env_file(env_file_path: str):
+    """加载.env文件到环境变量"""
+    try:
+        env_file_path = os.path.abspath(env_file_path)
+        mtime = os.path.getmtime(env_file_path)
+    except OSError:
+        return
+    
+    for key, value in _parse_env_file(env_file_path, mtime):
+        # 只有当环境变量不存在时才设置
+        os.environ.setdefault(key, value)
 
 @dataclass
 class ASMRConfig:
@@ -38,6 +47,10 @@ class ASMRConfig:
     aria2_port: int = 6800
     aria2_secret: str = ""
     progress_update_interval: int = 30
+    http_limit: int = 128
+    http_limit_per_host: int = 32
+    max_workers: int = 4
+    completed_tail_size: int = 50
 
     @classmethod
     def from_env(cls) -> 'ASMRConfig':
@@ -56,7 +69,11 @@ class ASMRConfig:
             aria2_host=os.getenv('ARIA2_HOST', 'http://localhost'),
             aria2_port=int(os.getenv('ARIA2_PORT', '6800')),
             aria2_secret=os.getenv('ARIA2_SECRET', ''),
-            progress_update_interval=int(os.getenv('ASMR_PROGRESS_UPDATE_INTERVAL', '30'))
+            progress_update_interval=int(os.getenv('ASMR_PROGRESS_UPDATE_INTERVAL', '30')),
+            http_limit=int(os.getenv('ASMR_HTTP_LIMIT', '128')),
+            http_limit_per_host=int(os.getenv('ASMR_HTTP_LIMIT_PER_HOST', '32')),
+            max_workers=int(os.getenv('ASMR_MAX_WORKERS', '4')),
+            completed_tail_size=int(os.getenv('ASMR_COMPLETED_TAIL_SIZE', '50'))
         )
 
     def validate(self) -> bool:
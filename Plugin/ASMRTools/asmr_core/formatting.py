@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formatting Helpers
+文本输出用的格式化工具
+"""
+
+from typing import Dict, Iterator
+
+# (除数, 单位) 按 bit_length 索引：每 10 位对应一级 1024
+_UNITS = ((1, "B"), (1024, "KB"), (1024 ** 2, "MB"), (1024 ** 3, "GB"))
+
+def format_bytes(bytes_val: int) -> str:
+    """格式化字节数"""
+    bytes_val = int(bytes_val)
+    idx = min(3, max(0, (bytes_val.bit_length() - 1) // 10))
+    if not idx:
+        return f"{bytes_val} B"
+    divisor, unit = _UNITS[idx]
+    return f"{bytes_val / divisor:.1f} {unit}"
+
+# 树状显示用的连接符
+_TEE = "├── "
+_ELBOW = "└── "
+_PIPE = "│   "
+_BLANK = "    "
+
+def _iter_structure(structure: Dict, indent: str = "") -> Iterator[str]:
+    """以显式栈迭代遍历文件结构，逐行产出树状显示文本"""
+    fmt = format_bytes  # 热循环内使用局部变量
+    # 每个栈帧: [子项迭代器, 缩进前缀, 剩余子项数]
+    stack = [[iter(structure.items()), indent, len(structure)]]
+    push = stack.append
+    
+    while stack:
+        frame = stack[-1]
+        if frame[2] == 0:
+            stack.pop()
+            continue
+        
+        name, item = next(frame[0])
+        frame[2] -= 1
+        is_last = frame[2] == 0
+        prefix = frame[1] + (_ELBOW if is_last else _TEE)
+        
+        if item.get("type") == "folder":
+            yield f"{prefix}📁 {name}/ ({item.get('file_count', 0)} 文件)\n"
+            
+            # 子项入栈
+            children = item.get("children")
+            if children is not None:
+                push([iter(children.items()), frame[1] + (_BLANK if is_last else _PIPE), len(children)])
+        else:
+            yield f"{prefix}📄 {name} ({fmt(item.get('size', 0))})\n"
+
+def format_file_structure(structure: Dict, indent: str = "") -> str:
+    """格式化文件结构为树状显示"""
+    return "".join(_iter_structure(structure, indent))
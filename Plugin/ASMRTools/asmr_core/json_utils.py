@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON Utilities
+优先使用orjson进行JSON解析和序列化，未安装时回退到标准库json
+"""
+
+import json
+import sys
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """解析JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> str:
+    """序列化为紧凑的JSON字符串，保留非ASCII字符（等价于ensure_ascii=False）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def dumpb(obj: Any) -> bytes:
+    """序列化为UTF-8编码的JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def emit(obj: Any) -> None:
+    """将JSON结果直接写入标准输出的字节缓冲区并刷新"""
+    # 先刷新文本层，保证与之前print的输出顺序一致
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dumpb(obj) + b"\n")
+    sys.stdout.buffer.flush()
@@ -5,12 +5,32 @@ Progress Manager
 管理异步下载进度的实时更新
 """
 
-import json
+import atexit
+import math
 import os
 import sys
+import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+
+from . import json_utils
+from .config import ASMRConfig
+from .formatting import format_bytes
+
+# ETA基于下载速率的指数加权移动平均，只需保留最近两个进度点
+HISTORY_SIZE = 2
+EWMA_TAU = 10.0  # 平滑时间常数（秒）
+ETA_MIN_ELAPSED = 3.0  # 至少观察3秒后才显示ETA
+
+class HistoryPoint(NamedTuple):
+    """ETA计算用的进度点"""
+    t: float
+    progress: float
+    completed: int
+    dl_bytes: int
+    total_bytes: int
 
 class ProgressManager:
     """进度管理器"""
@@ -24,16 +44,32 @@ class ProgressManager:
         self.results_dir.mkdir(exist_ok=True)
         
         # 从配置中获取进度更新间隔
-        from .config import ASMRConfig
         config = ASMRConfig.from_env()
         self.update_interval = config.progress_update_interval
+        # 下载中只保留并写入最近完成的文件，完整列表在下载成功时写入；至少保留3个用于消息显示
+        self.completed_tail_size = max(3, config.completed_tail_size)
         self.last_update_time = 0
+        self._last_update_monotonic = float('-inf')
+        self._last_progress: Optional[float] = None
         
         # ETA计算相关
         self._start_time = 0
-        self._progress_history = []  # 存储进度历史用于更准确的ETA计算
-        self._completed_files_list = []  # 存储已完成文件列表
+        self._progress_history = deque(maxlen=HISTORY_SIZE)  # 最近的进度点，用于更新速率
+        self._ewma_rate = 0.0  # 平滑后的下载速率（字节/秒，无字节信息时为百分比/秒）
+        self._ewma_start: Optional[float] = None
+        self._completed_files_list = []  # 最近完成的文件（最多completed_tail_size个）
+        self._completed_len = 0  # 已同步的完成文件总数
         self._file_structure = {}  # 存储文件结构信息
+        self._progress_file_cache: Dict[str, str] = {}  # task_id -> 进度文件路径
+        
+        # 后台写入线程：每个task只保留最新一次待写入的内容
+        self._pending: Dict[str, Tuple[str, bytes]] = {}
+        self._writing = False
+        self._pending_cond = threading.Condition()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="ASMRProgressWriter", daemon=True)
+        self._writer_thread.start()
+        # 写入线程是守护线程，解释器退出前先把未写出的进度落盘
+        atexit.register(self.flush)
     
     def update_progress(self, task_id: str, status: str, **kwargs) -> None:
         """更新任务进度"""
@@ -49,45 +85,104 @@ class ProgressManager:
             }
             
             # 写入进度文件，使用ASMRTools-{task_id}格式
-            progress_file = self.results_dir / f"ASMRTools-{task_id}.json"
-            with open(progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
+            progress_file = self._progress_file_cache.get(task_id)
+            if progress_file is None:
+                progress_file = self._progress_file_cache.setdefault(
+                    task_id, str(self.results_dir / f"ASMRTools-{task_id}.json")
+                )
+            payload = json_utils.dumpb(progress_data)
+            
+            # 交给后台线程写入，同一task未写出的旧进度直接被覆盖
+            with self._pending_cond:
+                self._pending[task_id] = (progress_file, payload)
+                self._pending_cond.notify_all()
                 
         except Exception as e:
             print(f"Failed to update progress for task {task_id}: {e}", file=sys.stderr)
     
+    def _writer_loop(self) -> None:
+        """后台写入循环，每轮取出所有待写入的进度并落盘"""
+        while True:
+            with self._pending_cond:
+                while not self._pending:
+                    self._pending_cond.wait()
+                batch = self._pending
+                self._pending = {}
+                self._writing = True
+            
+            for task_id, (progress_file, payload) in batch.items():
+                try:
+                    self._write_atomic(progress_file, payload)
+                except Exception as e:
+                    print(f"Failed to update progress for task {task_id}: {e}", file=sys.stderr)
+            
+            with self._pending_cond:
+                self._writing = False
+                self._pending_cond.notify_all()
+    
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """等待所有待写入的进度落盘，返回是否在超时前完成"""
+        with self._pending_cond:
+            return self._pending_cond.wait_for(
+                lambda: not self._pending and not self._writing, timeout
+            )
+    
+    @staticmethod
+    def _write_atomic(target: str, payload: bytes) -> None:
+        """一次性写入临时文件后替换目标文件，避免读取方读到写了一半的JSON"""
+        tmp_path = target + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        try:
+            os.replace(tmp_path, target)
+        except PermissionError:
+            # Windows下目标文件正被读取时无法替换，退回直接写入
+            with open(target, 'wb') as f:
+                f.write(payload)
+            os.unlink(tmp_path)
+    
     def update_download_progress(self, task_id: str, work_info: Dict, progress_percent: float, 
                                download_speed: int, completed_files: int, total_files: int,
                                current_file: str = "", completed_files_list: list = None,
                                downloaded_bytes: int = 0, total_bytes: int = 0) -> None:
         """更新下载进度"""
-        current_time = time.time()
+        current_time = time.monotonic()
         
-        # 更新已完成文件列表
-        if completed_files_list:
-            self._completed_files_list = completed_files_list.copy()
+        # 记录进度点并更新平滑速率（每次都记录，保证ETA连续）
+        self._record_point(HistoryPoint(
+            current_time, progress_percent, completed_files, downloaded_bytes, total_bytes
+        ))
         
-        # 记录进度历史用于ETA计算（每次都记录，但ETA计算会过滤）
-        self._progress_history.append({
-            "time": current_time,
-            "progress": progress_percent,
-            "completed_files": completed_files,
-            "downloaded_bytes": downloaded_bytes,
-            "total_bytes": total_bytes
-        })
-        
-        # 只保留最近15个进度点（增加历史点数以提高ETA准确性）
-        if len(self._progress_history) > 15:
-            self._progress_history = self._progress_history[-15:]
+        # 更新已完成文件列表，只追加新增部分并截去超出保留数量的旧条目
+        if completed_files_list:
+            n = len(completed_files_list)
+            known = self._completed_len
+            tail = self.completed_tail_size
+            if n < known or (known and completed_files_list[known - 1] != self._completed_files_list[-1]):
+                # 列表被截断或替换，整体重建
+                self._completed_files_list = list(completed_files_list[-tail:])
+            elif n != known:
+                self._completed_files_list.extend(completed_files_list[max(known, n - tail):n])
+                del self._completed_files_list[:-tail]
+            self._completed_len = n
         
-        # 检查是否需要更新文件（根据配置的时间间隔，但ETA计算不受限制）
-        should_update_file = current_time - self.last_update_time >= self.update_interval
+        # 检查是否需要更新文件（根据配置的时间间隔）
+        should_update_file = current_time >= self._last_update_monotonic + self.update_interval
         
         # 强制更新：如果进度有显著变化或者是第一次更新
-        if abs(progress_percent - getattr(self, '_last_progress', 0)) > 1.0 or not hasattr(self, '_last_progress'):
+        if self._last_progress is None or abs(progress_percent - self._last_progress) > 1.0:
             should_update_file = True
             self._last_progress = progress_percent
         
+        # 未到更新时机时不做速度格式化、ETA计算和消息拼接
+        if not should_update_file:
+            return
+        
         # 格式化下载速度
         if download_speed > 1024 * 1024:  # MB/s
             speed_str = f"{download_speed / (1024 * 1024):.1f} MB/s"
@@ -99,165 +194,112 @@ class ProgressManager:
         # 改进的ETA计算
         eta_str = self._calculate_eta(progress_percent, current_time)
         
-        # 格式化文件大小
-        def format_bytes(bytes_val):
-            if bytes_val >= 1024 * 1024 * 1024:  # GB
-                return f"{bytes_val / (1024 * 1024 * 1024):.1f} GB"
-            elif bytes_val >= 1024 * 1024:  # MB
-                return f"{bytes_val / (1024 * 1024):.1f} MB"
-            elif bytes_val >= 1024:  # KB
-                return f"{bytes_val / 1024:.1f} KB"
-            else:
-                return f"{bytes_val} B"
-        
         # 构建更详细的消息
-        message = f"🎵 正在下载ASMR作品: {work_info.get('title', 'Unknown')}\n"
-        message += f"📊 进度: {progress_percent:.1f}% ({completed_files}/{total_files} 文件)\n"
+        parts = [f"🎵 正在下载ASMR作品: {work_info.get('title', 'Unknown')}\n"]
+        parts.append(f"📊 进度: {progress_percent:.1f}% ({completed_files}/{total_files} 文件)\n")
         
         # 添加文件大小信息
         if total_bytes > 0:
-            message += f"💾 大小: {format_bytes(downloaded_bytes)}/{format_bytes(total_bytes)}\n"
+            parts.append(f"💾 大小: {format_bytes(downloaded_bytes)}/{format_bytes(total_bytes)}\n")
         
-        message += f"⚡ 速度: {speed_str}\n"
-        message += f"⏱️ 预计剩余: {eta_str}\n"
+        parts.append(f"⚡ 速度: {speed_str}\n")
+        parts.append(f"⏱️ 预计剩余: {eta_str}\n")
         if current_file:
-            message += f"📁 当前文件: {current_file}\n"
+            parts.append(f"📁 当前文件: {current_file}\n")
         
         # 添加已完成文件的简要列表（最多显示3个最新的）
         if self._completed_files_list:
-            recent_files = self._completed_files_list[-3:] if len(self._completed_files_list) > 3 else self._completed_files_list
-            message += f"✅ 最近完成: {', '.join(recent_files)}"
-            if len(self._completed_files_list) > 3:
-                message += f" (共{len(self._completed_files_list)}个)"
+            recent_files = self._completed_files_list[-3:]
+            parts.append(f"✅ 最近完成: {', '.join(recent_files)}")
+            if self._completed_len > 3:
+                parts.append(f" (共{self._completed_len}个)")
+        message = "".join(parts)
         
-        # 只在需要时更新文件
-        if should_update_file:
-            self.last_update_time = current_time
-            
-            self.update_progress(
-                task_id=task_id,
-                status="Downloading",
-                workId=work_info.get('source_id', ''),
-                workTitle=work_info.get('title', 'Unknown Work'),
-                progress=progress_percent,
-                downloadSpeed=speed_str,
-                eta=eta_str,
-                completedFiles=completed_files,
-                totalFiles=total_files,
-                currentFile=current_file,
-                completedFilesList=self._completed_files_list,
-                fileStructure=self._file_structure,
-                downloadedBytes=downloaded_bytes,
-                totalBytes=total_bytes,
-                message=message
-            )
+        self._last_update_monotonic = current_time
+        self.last_update_time = time.time()
+        
+        self.update_progress(
+            task_id=task_id,
+            status="Downloading",
+            workId=work_info.get('source_id', ''),
+            workTitle=work_info.get('title', 'Unknown Work'),
+            progress=progress_percent,
+            downloadSpeed=speed_str,
+            eta=eta_str,
+            completedFiles=completed_files,
+            totalFiles=total_files,
+            currentFile=current_file,
+            completedFilesList=self._completed_files_list,
+            completedFilesCount=self._completed_len,
+            fileStructure=self._file_structure,
+            downloadedBytes=downloaded_bytes,
+            totalBytes=total_bytes,
+            message=message
+        )
+    
+    def _record_point(self, point: HistoryPoint) -> None:
+        """记录进度点，并以指数加权移动平均更新下载速率"""
+        if self._progress_history:
+            last = self._progress_history[-1]
+            dt = point.t - last.t
+            if dt > 0:
+                # 有字节信息时按字节计算速率，否则按百分比
+                if point.total_bytes > 0:
+                    instant_rate = (point.dl_bytes - last.dl_bytes) / dt
+                else:
+                    instant_rate = (point.progress - last.progress) / dt
+                
+                if self._ewma_start is None:
+                    # 第一个样本直接作为初始速率
+                    self._ewma_start = last.t
+                    self._ewma_rate = instant_rate
+                else:
+                    alpha = 1 - math.exp(-dt / EWMA_TAU)
+                    self._ewma_rate = alpha * instant_rate + (1 - alpha) * self._ewma_rate
+        
+        self._progress_history.append(point)
     
     def _calculate_eta(self, current_progress: float, current_time: float) -> str:
-        """计算更准确的ETA - 基于字节大小"""
+        """根据平滑后的下载速率计算ETA"""
         if current_progress <= 0 or current_progress >= 100:
             return "--:--"
         
-        if len(self._progress_history) < 2:
+        if self._ewma_start is None or current_time - self._ewma_start < ETA_MIN_ELAPSED:
             return "--:--"
         
-        try:
-            # 使用最近的进度点计算平均速度，优先使用字节数据
-            recent_history = self._progress_history[-min(8, len(self._progress_history)):]
-            
-            if len(recent_history) < 2:
-                return "--:--"
-            
-            # 计算总的时间差异
-            total_time_diff = recent_history[-1]["time"] - recent_history[0]["time"]
-            
-            # 降低时间间隔要求，允许更快的ETA计算
-            if total_time_diff < 3:  # 至少3秒的时间间隔
-                return "--:--"
-            
-            # 优先使用字节数据计算ETA
-            if (recent_history[-1].get("total_bytes", 0) > 0 and 
-                recent_history[-1].get("downloaded_bytes", 0) > 0):
-                
-                # 基于字节的ETA计算
-                bytes_diff = recent_history[-1]["downloaded_bytes"] - recent_history[0]["downloaded_bytes"]
-                
-                if bytes_diff > 0:
-                    # 计算字节下载速度（字节/秒）
-                    bytes_per_second = bytes_diff / total_time_diff
-                    remaining_bytes = recent_history[-1]["total_bytes"] - recent_history[-1]["downloaded_bytes"]
-                    
-                    if remaining_bytes > 0:
-                        eta_seconds = int(remaining_bytes / bytes_per_second)
-                    else:
-                        return "00:00"
-                else:
-                    # 如果字节数据不可用，回退到百分比计算
-                    return self._calculate_eta_by_progress(recent_history, current_progress, total_time_diff)
-            else:
-                # 如果字节数据不可用，回退到百分比计算
-                return self._calculate_eta_by_progress(recent_history, current_progress, total_time_diff)
-            
-            # 应用平滑因子，避免ETA跳跃过大
-            if hasattr(self, '_last_eta_seconds') and self._last_eta_seconds > 0:
-                # 如果新ETA与上次相差太大，使用加权平均
-                if abs(eta_seconds - self._last_eta_seconds) > self._last_eta_seconds * 0.4:
-                    eta_seconds = int(0.7 * self._last_eta_seconds + 0.3 * eta_seconds)
-            
-            self._last_eta_seconds = eta_seconds
-            
-            # 限制ETA显示范围，避免显示过大的数值
-            if eta_seconds > 7200:  # 超过2小时
-                return ">2h"
-            elif eta_seconds > 3600:  # 超过1小时
-                hours = eta_seconds // 3600
-                minutes = (eta_seconds % 3600) // 60
-                return f"{hours}h{minutes:02d}m"
-            else:
-                minutes = eta_seconds // 60
-                seconds = eta_seconds % 60
-                return f"{minutes:02d}:{seconds:02d}"
-                
-        except Exception as e:
-            print(f"ETA calculation error: {e}", file=sys.stderr)
+        if self._ewma_rate <= 0:
             return "--:--"
+        
+        last = self._progress_history[-1]
+        if last.total_bytes > 0:
+            remaining = last.total_bytes - last.dl_bytes
+            if remaining <= 0:
+                return "00:00"
+        else:
+            remaining = 100 - current_progress
+        
+        return self._format_eta(int(remaining / self._ewma_rate))
     
-    def _calculate_eta_by_progress(self, recent_history, current_progress, total_time_diff):
-        """基于进度百分比的ETA计算（备用方法）"""
-        try:
-            total_progress_diff = recent_history[-1]["progress"] - recent_history[0]["progress"]
-            
-            if total_progress_diff <= 0:
-                return "--:--"
-            
-            # 计算进度变化率（每秒进度百分比）
-            progress_rate = total_progress_diff / total_time_diff
-            remaining_progress = 100 - current_progress
-            
-            if progress_rate <= 0:
-                return "--:--"
-            
-            eta_seconds = int(remaining_progress / progress_rate)
-            
-            # 限制显示范围
-            if eta_seconds > 7200:
-                return ">2h"
-            elif eta_seconds > 3600:
-                hours = eta_seconds // 3600
-                minutes = (eta_seconds % 3600) // 60
-                return f"{hours}h{minutes:02d}m"
-            else:
-                minutes = eta_seconds // 60
-                seconds = eta_seconds % 60
-                return f"{minutes:02d}:{seconds:02d}"
-                
-        except Exception:
-            return "--:--"
+    @staticmethod
+    def _format_eta(eta_seconds: int) -> str:
+        """格式化ETA，限制显示范围，避免显示过大的数值"""
+        if eta_seconds > 7200:  # 超过2小时
+            return ">2h"
+        elif eta_seconds > 3600:  # 超过1小时
+            hours = eta_seconds // 3600
+            minutes = (eta_seconds % 3600) // 60
+            return f"{hours}h{minutes:02d}m"
+        else:
+            minutes = eta_seconds // 60
+            seconds = eta_seconds % 60
+            return f"{minutes:02d}:{seconds:02d}"
     
     def update_success(self, task_id: str, work_info: Dict, download_result: Dict) -> None:
         """更新成功状态"""
-        message = f"ASMR作品下载完成: {work_info.get('title', 'Unknown')}\n"
-        message += f"成功下载: {download_result['success_count']}/{download_result['total_tracks']} 个文件\n"
-        message += f"下载目录: {download_result['download_dir']}"
+        parts = [f"ASMR作品下载完成: {work_info.get('title', 'Unknown')}\n"]
+        parts.append(f"成功下载: {download_result['success_count']}/{download_result['total_tracks']} 个文件\n")
+        parts.append(f"下载目录: {download_result['download_dir']}")
+        message = "".join(parts)
         
         self.update_progress(
             task_id=task_id,
@@ -272,6 +314,8 @@ class ProgressManager:
             failedFilesList=download_result['failed_downloads'],
             message=message
         )
+        # 终态必须落盘，任务返回后进程可能随即退出
+        self.flush()
     
     def update_failed(self, task_id: str, reason: str, work_info: Optional[Dict] = None) -> None:
         """更新失败状态"""
@@ -291,14 +335,19 @@ class ProgressManager:
             })
         
         self.update_progress(**update_data)
+        self.flush()
     
     def update_starting(self, task_id: str, work_id: str) -> None:
         """更新开始状态"""
         self._start_time = time.time()
-        self._progress_history = []
+        self._progress_history = deque(maxlen=HISTORY_SIZE)
+        self._ewma_rate = 0.0  # 重置ETA历史
+        self._ewma_start = None
         self._completed_files_list = []
+        self._completed_len = 0
         self._file_structure = {}
-        self._last_eta_seconds = 0  # 重置ETA历史
+        self._last_progress = None
+        self._last_update_monotonic = float('-inf')
         
         self.update_progress(
             task_id=task_id,
@@ -319,11 +368,12 @@ class ProgressManager:
         if file_structure:
             self._file_structure = file_structure
             
-        message = f"📋 正在准备下载: {work_info.get('title', 'Unknown')}\n"
-        message += f"📁 找到 {total_files} 个文件"
+        parts = [f"📋 正在准备下载: {work_info.get('title', 'Unknown')}\n"]
+        parts.append(f"📁 找到 {total_files} 个文件")
         
         if file_structure:
-            message += f"\n🗂️ 文件结构已分析完成"
+            parts.append(f"\n🗂️ 文件结构已分析完成")
+        message = "".join(parts)
         
         self.update_progress(
             task_id=task_id,
@@ -340,6 +390,9 @@ class ProgressManager:
         """清理进度文件（可选）"""
         try:
             progress_file = self.results_dir / f"ASMRTools-{task_id}.json"
+            self._progress_file_cache.pop(task_id, None)
+            # 先把该task尚未写出的进度落盘
+            self.flush()
             if progress_file.exists():
                 # 可以选择删除或保留文件
                 # progress_file.unlink()
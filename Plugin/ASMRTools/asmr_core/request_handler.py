@@ -6,64 +6,142 @@ Request Handler
 """
 
 import asyncio
+import atexit
+import heapq
 import json
-from typing import Dict, Any
+import operator
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
 
 from .config import ASMRConfig
 from .asmr_api import ASMRAPIClient
+from .formatting import format_bytes, format_file_structure
+from .sync_downloader_simple import SyncDownloaderSimple as _SDS
 
-def format_bytes(bytes_val: int) -> str:
-    """格式化字节数"""
-    if bytes_val >= 1024 * 1024 * 1024:  # GB
-        return f"{bytes_val / (1024 * 1024 * 1024):.1f} GB"
-    elif bytes_val >= 1024 * 1024:  # MB
-        return f"{bytes_val / (1024 * 1024):.1f} MB"
-    elif bytes_val >= 1024:  # KB
-        return f"{bytes_val / 1024:.1f} KB"
-    else:
-        return f"{bytes_val} B"
+# 进程内缓存的配置，避免每个请求都重新读取环境变量
+_CONFIG_SINGLETON: Optional[ASMRConfig] = None
+_config_lock = threading.Lock()
 
-def format_file_structure(structure: Dict, indent: str = "") -> str:
-    """格式化文件结构为树状显示"""
-    result = ""
-    items = list(structure.items())
-    
-    for i, (name, item) in enumerate(items):
-        is_last = i == len(items) - 1
-        current_indent = "└── " if is_last else "├── "
+def _get_config() -> ASMRConfig:
+    """获取缓存的配置（首次调用时从环境变量加载）"""
+    global _CONFIG_SINGLETON
+    if _CONFIG_SINGLETON is None:
+        with _config_lock:
+            if _CONFIG_SINGLETON is None:
+                _CONFIG_SINGLETON = ASMRConfig.from_env()
+    return _CONFIG_SINGLETON
+
+# 跨请求复用的事件循环和已登录的API客户端（客户端会话绑定在该事件循环上）
+_EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_CLIENT: Optional[ASMRAPIClient] = None
+
+def _run(coro):
+    """在复用的事件循环上运行协程"""
+    global _EVENT_LOOP
+    if _EVENT_LOOP is None or _EVENT_LOOP.is_closed():
+        _EVENT_LOOP = asyncio.new_event_loop()
+    return _EVENT_LOOP.run_until_complete(coro)
+
+async def _get_client(config: ASMRConfig) -> ASMRAPIClient:
+    """获取共享的API客户端，首次调用时创建会话并登录"""
+    global _CLIENT
+    if _CLIENT is None:
+        client = ASMRAPIClient(config)
+        await client.__aenter__()
+        _CLIENT = client
+    elif not _CLIENT.is_authenticated:
+        # 上次登录失败，重新尝试
+        _CLIENT.is_authenticated = await _CLIENT.login()
+    return _CLIENT
+
+@asynccontextmanager
+async def _shared_client(config: ASMRConfig):
+    """以上下文管理器形式提供共享客户端，退出时不关闭会话"""
+    yield await _get_client(config)
+
+def _close_client():
+    """进程退出时关闭共享客户端和事件循环"""
+    global _CLIENT, _EVENT_LOOP
+    if _EVENT_LOOP is None or _EVENT_LOOP.is_closed():
+        return
+    try:
+        if _CLIENT is not None:
+            _EVENT_LOOP.run_until_complete(_CLIENT.__aexit__(None, None, None))
+            _CLIENT = None
         
-        if item.get("type") == "folder":
-            file_count = item.get("file_count", 0)
-            result += f"{indent}{current_indent}📁 {name}/ ({file_count} 文件)\n"
-            
-            # 递归显示子项
-            if "children" in item:
-                next_indent = indent + ("    " if is_last else "│   ")
-                result += format_file_structure(item["children"], next_indent)
-        else:
-            file_size = item.get("size", 0)
-            result += f"{indent}{current_indent}📄 {name} ({format_bytes(file_size)})\n"
+        # 取消仍未完成的任务，并等待其处理取消
+        pending = asyncio.all_tasks(_EVENT_LOOP)
+        for task in pending:
+            task.cancel()
+        if pending:
+            _EVENT_LOOP.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        _EVENT_LOOP.run_until_complete(_EVENT_LOOP.shutdown_asyncgens())
+    finally:
+        _EVENT_LOOP.close()
+        _EVENT_LOOP = None
+
+atexit.register(_close_client)
+
+# 文件信息的大小字段
+_size_of = operator.itemgetter("size")
+
+# 作品链接模板
+_DLSITE = "https://www.dlsite.com/maniax/work/=/product_id/{}.html"
+_ASMR = "https://asmr.one/work/{}"
+
+def _format_work_summary(parts: List[str], work: Dict, index: int, *,
+                         show_dl: bool = False, show_reviews: bool = False,
+                         show_details: bool = False) -> None:
+    """将单个作品的摘要行追加到parts中，供列表类命令共用"""
+    sid = work.get("source_id", "")
+    circle_name = (work.get("circle") or {}).get("name", "") or work.get("circle_name", "")
+    rating = work.get("rate_average_2dp", 0)
+    
+    parts.append(f"{index}. [{sid}] {work.get('title', '')}\n")
+    parts.append(f"   社团: {circle_name}\n")
+    if show_details:
+        parts.append(f"   发布日期: {work.get('release', '')}\n")
+    if show_reviews:
+        parts.append(f"   评分: {rating:.2f} ({work.get('review_count', 0)}评价)\n")
+    else:
+        parts.append(f"   评分: {rating:.2f}\n")
+    if show_dl:
+        parts.append(f"   下载量: {work.get('dl_count', 0)}\n")
+    parts.append(f"   价格: {work.get('price', 0)}円\n")
+    if show_details:
+        parts.append(f"   年龄分级: {work.get('age_category_string', '')}\n")
+        parts.append(f"   字幕: {'有' if work.get('has_subtitle', False) else '无'}\n")
+    
+    cover_url = work.get("mainCoverUrl")
+    if cover_url:
+        parts.append(f"   封面图片: {cover_url}\n")
+    if sid:
+        parts.append(f"   ASMR.one链接: {_ASMR.format(sid)}\n")
+        parts.append(f"   DLSite链接: {_DLSITE.format(sid)}\n")
     
-    return result
+    if show_details:
+        tags = [tag.get("name", "") for tag in work.get("tags", [])]
+        if tags:
+            parts.append(f"   标签: {', '.join(tags[:5])}\n")
+        vas = [va.get("name", "") for va in work.get("vas", [])]
+        if vas:
+            parts.append(f"   声优: {', '.join(vas[:3])}\n")
+    parts.append("\n")
 
 def process_request(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """处理同步请求"""
     try:
         command = request_data.get('command')
         
-        if command == "SearchWorks":
-            return asyncio.run(handle_search_works(request_data))
-        elif command == "GetWorkInfo":
-            return asyncio.run(handle_get_work_info(request_data))
-        elif command == "GetRecommendations":
-            return asyncio.run(handle_get_recommendations(request_data))
-        elif command == "GetPopularWorks":
-            return asyncio.run(handle_get_popular_works(request_data))
-        else:
+        handler = _HANDLERS.get(command)
+        if handler is None:
             return {
                 "status": "error",
                 "error": f"Unknown command: {command}"
             }
+        
+        return _run(handler(request_data))
             
     except Exception as e:
         return {
@@ -74,7 +152,7 @@ def process_request(request_data: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_search_works(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """处理搜索作品请求"""
     try:
-        config = ASMRConfig.from_env()
+        config = _get_config()
         if not config.validate():
             return {
                 "status": "error",
@@ -101,72 +179,20 @@ async def handle_search_works(request_data: Dict[str, Any]) -> Dict[str, Any]:
         
         limit = int(request_data.get('limit', 20))
         
-        async with ASMRAPIClient(config) as client:
+        async with _shared_client(config) as client:
             works = await client.search_works(keyword, **filters)
             
             # 限制返回结果数量
             if limit > 0:
                 works = works[:limit]
             
-            # 格式化结果
-            formatted_works = []
-            for work in works:
-                # 获取社团名称
-                circle_name = ""
-                if work.get("circle"):
-                    circle_name = work["circle"].get("name", "")
-                elif work.get("circle_name"):
-                    circle_name = work["circle_name"]
-                
-                # 构建DLSite链接
-                dlsite_url = ""
-                asmr_one_url = ""
-                if work.get("source_id"):
-                    work_id = work["source_id"]
-                    dlsite_url = f"https://www.dlsite.com/maniax/work/=/product_id/{work_id}.html"
-                    asmr_one_url = f"https://asmr.one/work/{work_id}"
-                
-                formatted_work = {
-                    "id": work.get("source_id", ""),
-                    "title": work.get("title", ""),
-                    "circle_name": circle_name,
-                    "release_date": work.get("release", ""),
-                    "age_category": work.get("age_category_string", ""),
-                    "has_subtitle": work.get("has_subtitle", False),
-                    "rating": work.get("rate_average_2dp", 0),
-                    "review_count": work.get("review_count", 0),
-                    "price": work.get("price", 0),
-                    "tags": [tag.get("name", "") for tag in work.get("tags", [])],
-                    "vas": [va.get("name", "") for va in work.get("vas", [])],
-                    "cover_url": work.get("mainCoverUrl", ""),
-                    "thumbnail_url": work.get("thumbnailCoverUrl", ""),
-                    "dlsite_url": dlsite_url,
-                    "asmr_one_url": asmr_one_url
-                }
-                formatted_works.append(formatted_work)
+            parts = [f"搜索关键词: {keyword}\n"]
+            parts.append(f"找到 {len(works)} 个作品:\n\n")
             
-            result_text = f"搜索关键词: {keyword}\n"
-            result_text += f"找到 {len(formatted_works)} 个作品:\n\n"
+            for i, work in enumerate(works, 1):
+                _format_work_summary(parts, work, i, show_reviews=True, show_details=True)
             
-            for i, work in enumerate(formatted_works, 1):
-                result_text += f"{i}. [{work['id']}] {work['title']}\n"
-                result_text += f"   社团: {work['circle_name']}\n"
-                result_text += f"   发布日期: {work['release_date']}\n"
-                result_text += f"   评分: {work['rating']:.2f} ({work['review_count']}评价)\n"
-                result_text += f"   价格: {work['price']}円\n"
-                result_text += f"   年龄分级: {work['age_category']}\n"
-                result_text += f"   字幕: {'有' if work['has_subtitle'] else '无'}\n"
-                if work['cover_url']:
-                    result_text += f"   封面图片: {work['cover_url']}\n"
-                if work['asmr_one_url']:
-                    result_text += f"   ASMR.one链接: {work['asmr_one_url']}\n"
-                if work['dlsite_url']:
-                    result_text += f"   DLSite链接: {work['dlsite_url']}\n"
-                if work['tags']:
-                    result_text += f"   标签: {', '.join(work['tags'][:5])}\n"
-                if work['vas']:
-                    result_text += f"   声优: {', '.join(work['vas'][:3])}\n"
-                result_text += "\n"
+            result_text = "".join(parts)
             
             return {
                 "status": "success",
@@ -182,7 +208,7 @@ async def handle_search_works(request_data: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_get_work_info(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """处理获取作品信息请求"""
     try:
-        config = ASMRConfig.from_env()
+        config = _get_config()
         if not config.validate():
             return {
                 "status": "error",
@@ -196,8 +222,12 @@ async def handle_get_work_info(request_data: Dict[str, Any]) -> Dict[str, Any]:
                 "error": "Work ID is required"
             }
         
-        async with ASMRAPIClient(config) as client:
-            work_info = await client.get_work_info(work_id)
+        async with _shared_client(config) as client:
+            # 并发获取作品信息和音轨信息
+            work_info, tracks = await asyncio.gather(
+                client.get_work_info(work_id),
+                client.get_work_tracks(work_id),
+            )
             
             if not work_info:
                 return {
@@ -205,12 +235,9 @@ async def handle_get_work_info(request_data: Dict[str, Any]) -> Dict[str, Any]:
                     "error": f"Work not found: {work_id}"
                 }
             
-            # 获取音轨信息
-            tracks = await client.get_work_tracks(work_id)
-            
             # 格式化结果
-            result_text = f"作品信息: {work_id}\n\n"
-            result_text += f"标题: {work_info.get('title', 'N/A')}\n"
+            parts = [f"作品信息: {work_id}\n\n"]
+            parts.append(f"标题: {work_info.get('title', 'N/A')}\n")
             
             # 获取社团名称
             circle_name = "N/A"
@@ -218,74 +245,68 @@ async def handle_get_work_info(request_data: Dict[str, Any]) -> Dict[str, Any]:
                 circle_name = work_info["circle"].get("name", "N/A")
             elif work_info.get("circle_name"):
                 circle_name = work_info["circle_name"]
-            result_text += f"社团: {circle_name}\n"
-            result_text += f"发布日期: {work_info.get('release', 'N/A')}\n"
-            result_text += f"年龄分级: {work_info.get('age_category_string', 'N/A')}\n"
-            result_text += f"评分: {work_info.get('rate_average_2dp', 0):.2f} ({work_info.get('review_count', 0)}评价)\n"
-            result_text += f"价格: {work_info.get('price', 0)}円\n"
-            result_text += f"销量: {work_info.get('dl_count', 0)}\n"
-            result_text += f"字幕: {'有' if work_info.get('has_subtitle') else '无'}\n"
+            parts.append(f"社团: {circle_name}\n")
+            parts.append(f"发布日期: {work_info.get('release', 'N/A')}\n")
+            parts.append(f"年龄分级: {work_info.get('age_category_string', 'N/A')}\n")
+            parts.append(f"评分: {work_info.get('rate_average_2dp', 0):.2f} ({work_info.get('review_count', 0)}评价)\n")
+            parts.append(f"价格: {work_info.get('price', 0)}円\n")
+            parts.append(f"销量: {work_info.get('dl_count', 0)}\n")
+            parts.append(f"字幕: {'有' if work_info.get('has_subtitle') else '无'}\n")
             
             # 添加封面图片信息
             if work_info.get('mainCoverUrl'):
-                result_text += f"封面图片: {work_info.get('mainCoverUrl')}\n"
+                parts.append(f"封面图片: {work_info.get('mainCoverUrl')}\n")
             if work_info.get('thumbnailCoverUrl'):
-                result_text += f"缩略图: {work_info.get('thumbnailCoverUrl')}\n"
+                parts.append(f"缩略图: {work_info.get('thumbnailCoverUrl')}\n")
             
             # 添加网址链接
             if work_info.get('source_id'):
                 work_id_for_url = work_info['source_id']
-                result_text += f"ASMR.one链接: https://asmr.one/work/{work_id_for_url}\n"
-                result_text += f"DLSite链接: https://www.dlsite.com/maniax/work/=/product_id/{work_id_for_url}.html\n"
+                parts.append(f"ASMR.one链接: {_ASMR.format(work_id_for_url)}\n")
+                parts.append(f"DLSite链接: {_DLSITE.format(work_id_for_url)}\n")
             
             # 标签信息
             tags = work_info.get('tags', [])
             if tags:
-                result_text += f"标签: {', '.join([tag.get('name', '') for tag in tags])}\n"
+                parts.append(f"标签: {', '.join([tag.get('name', '') for tag in tags])}\n")
             
             # 声优信息
             vas = work_info.get('vas', [])
             if vas:
-                result_text += f"声优: {', '.join([va.get('name', '') for va in vas])}\n"
+                parts.append(f"声优: {', '.join([va.get('name', '') for va in vas])}\n")
             
             # 文件结构和大小信息
             if tracks:
-                # 构建文件结构
-                from .sync_downloader_simple import SyncDownloaderSimple
-                
-                # 创建一个临时的下载器实例来构建文件结构
-                temp_config = ASMRConfig.from_env()
-                temp_downloader = SyncDownloaderSimple(temp_config, None)
-                
-                # 提取所有文件信息
-                all_files = temp_downloader._extract_files_from_tracks(tracks)
-                file_structure = temp_downloader._build_file_structure(tracks)
+                # 一次遍历同时构建文件结构和文件列表
+                all_files = []
+                file_structure = _SDS._build_file_structure(tracks, files=all_files)
                 
                 # 计算总大小
-                total_size = sum(file_info.get('size', 0) for file_info in all_files)
+                total_size = sum(map(_size_of, all_files))
                 
-                result_text += f"\n📊 文件统计:\n"
-                result_text += f"文件总数: {len(all_files)} 个\n"
-                result_text += f"总大小: {format_bytes(total_size)}\n"
+                parts.append(f"\n📊 文件统计:\n")
+                parts.append(f"文件总数: {len(all_files)} 个\n")
+                parts.append(f"总大小: {format_bytes(total_size)}\n")
                 
                 # 显示文件结构
-                result_text += f"\n📁 文件结构:\n"
-                result_text += format_file_structure(file_structure, "")
+                parts.append(f"\n📁 文件结构:\n")
+                parts.append(format_file_structure(file_structure, ""))
                 
                 # 显示最大的几个文件
                 if all_files:
-                    sorted_files = sorted(all_files, key=lambda x: x.get('size', 0), reverse=True)
-                    largest_files = sorted_files[:5]
+                    largest_files = heapq.nlargest(5, all_files, key=_size_of)
                     
-                    result_text += f"\n📈 最大的文件:\n"
+                    parts.append(f"\n📈 最大的文件:\n")
                     for i, file_info in enumerate(largest_files, 1):
                         file_size = file_info.get('size', 0)
                         percentage = (file_size / total_size * 100) if total_size > 0 else 0
-                        result_text += f"{i}. {file_info.get('filename', 'Unknown')} - {format_bytes(file_size)} ({percentage:.1f}%)\n"
+                        parts.append(f"{i}. {file_info.get('filename', 'Unknown')} - {format_bytes(file_size)} ({percentage:.1f}%)\n")
             
             # 简介
             if work_info.get('intro'):
-                result_text += f"\n简介:\n{work_info.get('intro')}\n"
+                parts.append(f"\n简介:\n{work_info.get('intro')}\n")
+            
+            result_text = "".join(parts)
             
             return {
                 "status": "success",
@@ -301,7 +322,7 @@ async def handle_get_work_info(request_data: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_get_recommendations(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """处理获取推荐作品请求"""
     try:
-        config = ASMRConfig.from_env()
+        config = _get_config()
         if not config.validate():
             return {
                 "status": "error",
@@ -310,33 +331,18 @@ async def handle_get_recommendations(request_data: Dict[str, Any]) -> Dict[str,
         
         limit = int(request_data.get('limit', 10))
         
-        async with ASMRAPIClient(config) as client:
+        async with _shared_client(config) as client:
             works = await client.get_recommendations()
             
             if limit > 0:
                 works = works[:limit]
             
-            result_text = f"推荐作品 ({len(works)}个):\n\n"
+            parts = [f"推荐作品 ({len(works)}个):\n\n"]
             
             for i, work in enumerate(works, 1):
-                # 获取社团名称
-                circle_name = ""
-                if work.get("circle"):
-                    circle_name = work["circle"].get("name", "")
-                elif work.get("circle_name"):
-                    circle_name = work["circle_name"]
-                
-                result_text += f"{i}. [{work.get('source_id', '')}] {work.get('title', '')}\n"
-                result_text += f"   社团: {circle_name}\n"
-                result_text += f"   评分: {work.get('rate_average_2dp', 0):.2f}\n"
-                result_text += f"   价格: {work.get('price', 0)}円\n"
-                if work.get('mainCoverUrl'):
-                    result_text += f"   封面图片: {work.get('mainCoverUrl')}\n"
-                if work.get('source_id'):
-                    work_id = work['source_id']
-                    result_text += f"   ASMR.one链接: https://asmr.one/work/{work_id}\n"
-                    result_text += f"   DLSite链接: https://www.dlsite.com/maniax/work/=/product_id/{work_id}.html\n"
-                result_text += "\n"
+                _format_work_summary(parts, work, i)
+            
+            result_text = "".join(parts)
             
             return {
                 "status": "success",
@@ -352,7 +358,7 @@ async def handle_get_recommendations(request_data: Dict[str, Any]) -> Dict[str,
 async def handle_get_popular_works(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """处理获取热门作品请求"""
     try:
-        config = ASMRConfig.from_env()
+        config = _get_config()
         if not config.validate():
             return {
                 "status": "error",
@@ -361,34 +367,18 @@ async def handle_get_popular_works(request_data: Dict[str, Any]) -> Dict[str, An
         
         limit = int(request_data.get('limit', 10))
         
-        async with ASMRAPIClient(config) as client:
+        async with _shared_client(config) as client:
             works = await client.get_popular_works()
             
             if limit > 0:
                 works = works[:limit]
             
-            result_text = f"热门作品 ({len(works)}个):\n\n"
+            parts = [f"热门作品 ({len(works)}个):\n\n"]
             
             for i, work in enumerate(works, 1):
-                # 获取社团名称
-                circle_name = ""
-                if work.get("circle"):
-                    circle_name = work["circle"].get("name", "")
-                elif work.get("circle_name"):
-                    circle_name = work["circle_name"]
-                
-                result_text += f"{i}. [{work.get('source_id', '')}] {work.get('title', '')}\n"
-                result_text += f"   社团: {circle_name}\n"
-                result_text += f"   评分: {work.get('rate_average_2dp', 0):.2f}\n"
-                result_text += f"   下载量: {work.get('dl_count', 0)}\n"
-                result_text += f"   价格: {work.get('price', 0)}円\n"
-                if work.get('mainCoverUrl'):
-                    result_text += f"   封面图片: {work.get('mainCoverUrl')}\n"
-                if work.get('source_id'):
-                    work_id = work['source_id']
-                    result_text += f"   ASMR.one链接: https://asmr.one/work/{work_id}\n"
-                    result_text += f"   DLSite链接: https://www.dlsite.com/maniax/work/=/product_id/{work_id}.html\n"
-                result_text += "\n"
+                _format_work_summary(parts, work, i, show_dl=True)
+            
+            result_text = "".join(parts)
             
             return {
                 "status": "success",
@@ -399,4 +389,12 @@ async def handle_get_popular_works(request_data: Dict[str, Any]) -> Dict[str, An
         return {
             "status": "error",
             "error": f"Get popular works failed: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+# 命令名 -> 处理函数
+_HANDLERS = {
+    "SearchWorks": handle_search_works,
+    "GetWorkInfo": handle_get_work_info,
+    "GetRecommendations": handle_get_recommendations,
+    "GetPopularWorks": handle_get_popular_works,
+}
@@ -5,10 +5,77 @@ Sync Downloader Simple
 简化的同步下载器，使用已有的requests session
 """
 
+import functools
 import os
+import re
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from urllib.parse import urlsplit
+from typing import Dict, Iterable, List, Optional, Callable, Set, Tuple, Union
+
+# 下载复制缓冲大小和进度回调的最小字节间隔
+COPY_BUFFER_SIZE = 1024 * 1024
+PROGRESS_INTERVAL_BYTES = 2 * 1024 * 1024
+
+# (连接超时, 读取超时)，避免连接阶段卡住耗尽整个超时预算
+DOWNLOAD_TIMEOUT = (10, 60)
+
+# 文件名中不合法的字符
+_SANITIZE_RE = re.compile(r'[<>:"/\\|?*]')
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize(filename: str) -> str:
+    """移除或替换不合法字符，同一标题在多次遍历中只处理一次（缓存大小有上限）"""
+    filename = _SANITIZE_RE.sub('_', filename).strip('. ')
+    return filename or "unnamed_file"
+
+class _ProgressWriter:
+    """包装目标文件的写入对象，统计已写入字节数并按节流规则触发进度回调"""
+    
+    def __init__(self, f, filename: str, total_size: int, progress_callback: Optional[Callable]):
+        self._f = f
+        self.filename = filename
+        self.total_size = total_size
+        self.progress_callback = progress_callback
+        self.downloaded_size = 0
+        self.start_time = time.monotonic()
+        self.last_progress_time = 0.0
+        self.last_progress_bytes = 0
+    
+    def write(self, data) -> int:
+        # 目标是无缓冲的原始文件对象，可能只写入部分数据，循环直到写完
+        view = memoryview(data)
+        while view:
+            view = view[self._f.write(view):]
+        written = len(data)
+        self.downloaded_size += written
+        
+        # 按字节增量粗筛，未满PROGRESS_INTERVAL_BYTES时不读时钟也不计算进度
+        if self.progress_callback is None or self.downloaded_size - self.last_progress_bytes < PROGRESS_INTERVAL_BYTES:
+            return written
+        
+        # 时间间隔作为第二道限制，最多每2秒回调一次
+        current_time = time.monotonic()
+        if current_time - self.last_progress_time < 2.0:
+            return written
+        
+        elapsed_time = current_time - self.start_time
+        download_speed = int(self.downloaded_size / elapsed_time) if elapsed_time > 0 else 0
+        progress_percent = (self.downloaded_size / self.total_size * 100) if self.total_size > 0 else 0
+        self.progress_callback({
+            "filename": self.filename,
+            "status": "active",
+            "completed_length": self.downloaded_size,
+            "total_length": self.total_size,
+            "download_speed": download_speed,
+            "progress_percent": progress_percent
+        })
+        self.last_progress_time = current_time
+        self.last_progress_bytes = self.downloaded_size
+        return written
 
 class SyncDownloaderSimple:
     """简化的同步下载器"""
@@ -16,123 +83,110 @@ class SyncDownloaderSimple:
     def __init__(self, config, session):
         self.config = config
         self.session = session
+        self._callback_lock = threading.Lock()
+        self._ensured_dirs: Set[Path] = set()  # 本次下载中已创建过的目录
+        self._dirs_lock = threading.Lock()
         
-    def _extract_files_from_tracks(self, tracks: List[Dict], base_path: str = "") -> List[Dict]:
+    @classmethod
+    def _extract_files_from_tracks(cls, tracks: Iterable[Dict], base_path: str = "") -> List[Dict]:
         """递归提取所有文件从嵌套的音轨结构"""
         files = []
-        
-        for track in tracks:
-            if track.get("type") == "folder":
-                # 如果是文件夹，递归处理子项
-                track_title = track.get("title", "Unknown Folder")
-                children = track.get("children", [])
-                folder_path = f"{base_path}/{self._sanitize_filename(track_title)}" if base_path else self._sanitize_filename(track_title)
-                files.extend(self._extract_files_from_tracks(children, folder_path))
-            else:
-                # 如果是文件，添加到列表
-                file_info = {
-                    "title": track.get("title", "Unknown File"),
-                    "mediaDownloadUrl": track.get("mediaDownloadUrl", ""),
-                    "path": base_path,
-                    "filename": self._sanitize_filename(track.get("title", "Unknown File")),
-                    "size": track.get("size", 0)  # 添加文件大小信息
-                }
-                files.append(file_info)
-        
+        cls._build_file_structure(tracks, base_path, files=files)
         return files
     
-    def _build_file_structure(self, tracks: List[Dict], base_path: str = "") -> Dict:
-        """构建文件结构树用于显示"""
+    @classmethod
+    def _select_files(cls, tracks: List[Dict], target_path: str = "",
+                      extracted: Optional[List[Dict]] = None) -> List[Dict]:
+        """提取文件列表并按目标路径过滤；已遍历过音轨时可传入extracted避免重复遍历"""
+        files = extracted if extracted is not None else cls._extract_files_from_tracks(tracks)
+        if target_path:
+            files = cls._filter_files_by_path(files, target_path)
+        return list(files)
+    
+    @classmethod
+    def _build_file_structure(cls, tracks: List[Dict], base_path: str = "",
+                              size_index: Optional[Dict[str, int]] = None,
+                              files: Optional[List[Dict]] = None) -> Dict:
+        """构建文件结构树用于显示，传入size_index/files时在同一次遍历中填充{文件名: 大小}索引和文件列表（所有音轨遍历都经由此方法）"""
+        return cls._build_counted_structure(tracks, base_path, size_index, files)[0]
+    
+    @classmethod
+    def _build_counted_structure(cls, tracks: List[Dict], base_path: str,
+                                 size_index: Optional[Dict[str, int]],
+                                 files: Optional[List[Dict]]) -> Tuple[Dict, int]:
+        """递归构建文件结构，同时自底向上累加文件数量，返回(结构, 文件数)"""
         structure = {}
+        file_count = 0
         
         for track in tracks:
             if track.get("type") == "folder":
-                track_title = track.get("title", "Unknown Folder")
                 children = track.get("children", [])
-                folder_name = self._sanitize_filename(track_title)
+                folder_name = cls._sanitize_filename(track.get("title", "Unknown Folder"))
                 
                 # 递归构建子结构
-                child_structure = self._build_file_structure(children, f"{base_path}/{folder_name}" if base_path else folder_name)
-                structure[folder_name] = {
+                child_structure, child_count = cls._build_counted_structure(
+                    children, f"{base_path}/{folder_name}" if base_path else folder_name, size_index, files
+                )
+                node = {
                     "type": "folder",
                     "children": child_structure,
-                    "file_count": self._count_files_in_structure(child_structure)
+                    "file_count": child_count
                 }
+                name = folder_name
             else:
-                filename = self._sanitize_filename(track.get("title", "Unknown File"))
-                structure[filename] = {
+                filename = cls._sanitize_filename(track.get("title", "Unknown File"))
+                file_size = track.get("size", 0)
+                node = {
                     "type": "file",
-                    "size": track.get("size", 0),
+                    "size": file_size,
                     "url": track.get("mediaDownloadUrl", "")
                 }
+                name = filename
+                if size_index is not None:
+                    size_index.setdefault(filename, file_size)
+                if files is not None:
+                    files.append({
+                        "title": track.get("title", "Unknown File"),
+                        "mediaDownloadUrl": track.get("mediaDownloadUrl", ""),
+                        "path": base_path,
+                        "filename": filename,
+                        "size": file_size
+                    })
+            
+            # 同名条目会被覆盖，先扣除被覆盖条目的计数
+            previous = structure.get(name)
+            if previous is not None:
+                file_count -= 1 if previous["type"] == "file" else previous["file_count"]
+            structure[name] = node
+            file_count += 1 if node["type"] == "file" else node["file_count"]
         
-        return structure
+        return structure, file_count
     
-    def _count_files_in_structure(self, structure: Dict) -> int:
-        """计算结构中的文件数量"""
-        count = 0
-        for item in structure.values():
-            if item["type"] == "file":
-                count += 1
-            elif item["type"] == "folder":
-                count += item.get("file_count", 0)
-        return count
-    
-    def _sanitize_filename(self, filename: str) -> str:
+    @staticmethod
+    def _sanitize_filename(filename: str) -> str:
         """清理文件名，移除不合法字符"""
-        import re
-        # 移除或替换不合法字符
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        filename = filename.strip('. ')
-        return filename if filename else "unnamed_file"
+        return _sanitize(filename)
     
-    def _filter_files_by_path(self, all_files: List[Dict], target_path: str) -> List[Dict]:
-        """根据目标路径过滤文件"""
-        filtered_files = []
-        
+    @classmethod
+    def _filter_files_by_path(cls, all_files: List[Dict], target_path: Union[str, Iterable[str]]) -> List[Dict]:
+        """根据目标路径过滤文件，支持单个路径或多个路径"""
         # 标准化目标路径（移除开头和结尾的斜杠）
-        target_path = target_path.strip('/')
-        
-        for file_info in all_files:
-            file_path = file_info.get("path", "")
-            filename = file_info.get("filename", "")
-            
-            # 构建完整的文件路径
-            if file_path:
-                full_path = f"{file_path}/{filename}"
-            else:
-                full_path = filename
-            
-            # 检查是否匹配目标路径
-            if self._path_matches(full_path, target_path):
-                filtered_files.append(file_info)
-        
-        return filtered_files
-    
-    def _path_matches(self, file_path: str, target_path: str) -> bool:
-        """检查文件路径是否匹配目标路径"""
-        # 标准化路径
-        file_path = file_path.strip('/')
-        target_path = target_path.strip('/')
+        targets = [target_path] if isinstance(target_path, str) else list(target_path)
+        targets = {t.strip('/') for t in targets}
         
         # 如果目标路径为空，匹配所有文件
-        if not target_path:
-            return True
+        if "" in targets:
+            return list(all_files)
         
-        # 精确匹配文件
-        if file_path == target_path:
-            return True
-        
-        # 检查是否在目标文件夹内
-        if file_path.startswith(target_path + '/'):
-            return True
-        
-        # 检查是否匹配文件夹
-        file_dir = '/'.join(file_path.split('/')[:-1]) if '/' in file_path else ""
-        if file_dir == target_path:
-            return True
-        
-        return False
+        # 先按文件所在目录匹配（目录即目标或位于目标文件夹内），再精确匹配文件完整路径
+        # str.startswith接受元组，一次调用完成所有前缀匹配
+        prefixes = tuple(t + '/' for t in targets)
+        return [
+            file_info for file_info in all_files
+            if (path := file_info.get("path", "")) in targets
+            or path.startswith(prefixes)
+            or (f"{path}/{file_info.get('filename', '')}" if path else file_info.get("filename", "")) in targets
+        ]
     
     def download_single_file(self, file_info: Dict, download_dir: Path, 
                            progress_callback: Optional[Callable] = None) -> bool:
@@ -149,20 +203,27 @@ class SyncDownloaderSimple:
             
             if file_path:
                 full_dir = download_dir / file_path
-                full_dir.mkdir(parents=True, exist_ok=True)
+                if full_dir not in self._ensured_dirs:
+                    full_dir.mkdir(parents=True, exist_ok=True)
+                    with self._dirs_lock:
+                        self._ensured_dirs.add(full_dir)
                 full_file_path = full_dir / filename
             else:
                 full_file_path = download_dir / filename
             
-            # 如果文件已存在且大小合理，跳过下载
-            if full_file_path.exists() and full_file_path.stat().st_size > 0:
+            # 如果文件已存在且大小合理，跳过下载（只stat一次）
+            try:
+                existing_size = os.stat(full_file_path).st_size
+            except FileNotFoundError:
+                existing_size = 0
+            if existing_size > 0:
                 print(f"File already exists, skipping: {filename}")
                 if progress_callback:
                     progress_callback({
                         "filename": filename,
                         "status": "skipped",  # 使用skipped状态而不是complete
-                        "completed_length": full_file_path.stat().st_size,
-                        "total_length": full_file_path.stat().st_size,
+                        "completed_length": existing_size,
+                        "total_length": existing_size,
                         "download_speed": 0,
                         "progress_percent": 100
                     })
@@ -170,41 +231,22 @@ class SyncDownloaderSimple:
             
             print(f"Downloading: {filename}")
             
-            # 开始下载，使用更大的chunk_size和timeout
-            response = self.session.get(url, stream=True, verify=False, timeout=60)
+            # 开始下载，流式读取响应体
+            response = self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
             if response.status_code != 200:
                 print(f"HTTP {response.status_code} for {filename}: {url}")
+                response.close()
                 return False
             
             total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-            start_time = time.time()
-            last_progress_time = 0
             
-            # 创建文件并写入数据，使用更大的chunk_size提高性能
-            with open(full_file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=65536):  # 64KB chunks
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 计算下载速度和进度
-                        current_time = time.time()
-                        elapsed_time = current_time - start_time
-                        download_speed = int(downloaded_size / elapsed_time) if elapsed_time > 0 else 0
-                        progress_percent = (downloaded_size / total_size * 100) if total_size > 0 else 0
-                        
-                        # 减少进度回调频率，只每2秒更新一次
-                        if progress_callback and (current_time - last_progress_time >= 2.0):
-                            progress_callback({
-                                "filename": filename,
-                                "status": "active",
-                                "completed_length": downloaded_size,
-                                "total_length": total_size,
-                                "download_speed": download_speed,
-                                "progress_percent": progress_percent
-                            })
-                            last_progress_time = current_time
+            # copyfileobj按COPY_BUFFER_SIZE分块循环读写，写入时顺带统计进度
+            # 文件以无缓冲方式打开，每块直接写入，省去一层缓冲区拷贝
+            with response, open(full_file_path, 'wb', buffering=0) as f:
+                writer = _ProgressWriter(f, filename, total_size, progress_callback)
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, writer, COPY_BUFFER_SIZE)
+            downloaded_size = writer.downloaded_size
             
             # 下载完成回调
             if progress_callback:
@@ -225,8 +267,9 @@ class SyncDownloaderSimple:
             return False
     
     def download_tracks(self, tracks: List[Dict], work_info: Dict, 
-                       progress_callback: Optional[Callable] = None, target_path: str = "") -> Dict:
-        """下载作品的所有音轨"""
+                       progress_callback: Optional[Callable] = None, target_path: str = "",
+                       files: Optional[List[Dict]] = None) -> Dict:
+        """下载作品的所有音轨，调用方已选出文件列表时通过files传入，不再遍历音轨"""
         work_id = work_info.get("source_id", "unknown")
         work_title = work_info.get("title", "Unknown Work")
         
@@ -234,27 +277,50 @@ class SyncDownloaderSimple:
         safe_title = self._sanitize_filename(work_title)
         download_dir = Path(self.config.download_path) / "asmr" / f"{work_id} - {safe_title}"
         download_dir.mkdir(parents=True, exist_ok=True)
+        with self._dirs_lock:
+            self._ensured_dirs.clear()
+            self._ensured_dirs.add(download_dir)
         
         print(f"Download directory: {download_dir}")
         
-        # 提取所有文件
-        all_files = self._extract_files_from_tracks(tracks)
-        
-        # 如果指定了目标路径，过滤文件
+        # 提取所有文件，如果指定了目标路径则过滤
+        all_files = files if files is not None else self._select_files(tracks, target_path)
         if target_path:
-            filtered_files = self._filter_files_by_path(all_files, target_path)
-            print(f"Found {len(all_files)} total files, filtering to {len(filtered_files)} files for path: {target_path}")
-            all_files = filtered_files
+            print(f"Found {len(all_files)} files for path: {target_path}")
         else:
             print(f"Found {len(all_files)} files to download")
         
+        # 多个下载线程共享同一个回调，加锁保证回调串行执行
+        if progress_callback:
+            user_callback = progress_callback
+            
+            def progress_callback(progress_info: Dict) -> None:
+                with self._callback_lock:
+                    user_callback(progress_info)
+        
         # 下载统计
         completed_downloads = []
         failed_downloads = []
         
-        # 顺序下载所有文件
-        for file_info in all_files:
-            success = self.download_single_file(file_info, download_dir, progress_callback)
+        # 按主机名分组提交下载，让同一主机的请求连续复用连接池中的长连接
+        dispatch_order = sorted(
+            range(len(all_files)),
+            key=lambda i: urlsplit(all_files[i].get("mediaDownloadUrl", "")).netloc
+        )
+        
+        # 并发下载所有文件，复用同一个session的连接池
+        max_workers = max(1, min(self.config.max_workers, len(all_files) or 1))
+        results = [False] * len(all_files)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ASMRDownload") as executor:
+            outcomes = executor.map(
+                lambda i: self.download_single_file(all_files[i], download_dir, progress_callback),
+                dispatch_order
+            )
+            for i, success in zip(dispatch_order, outcomes):
+                results[i] = success
+        
+        # 按文件列表的原有顺序汇总结果
+        for file_info, success in zip(all_files, results):
             if success:
                 completed_downloads.append(file_info.get("filename", "unknown"))
             else:
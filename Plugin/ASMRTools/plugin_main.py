@@ -12,23 +12,26 @@ import os
 from pathlib import Path
 
 # 确保可以导入本地模块
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
+current_dir = str(Path(__file__).parent)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from asmr_core.json_utils import emit, loads
 
 def main():
     """插件主入口函数"""
     try:
-        # 读取标准输入
-        input_data = sys.stdin.read().strip()
+        # 读取标准输入（直接读取字节，交给JSON解析器处理首尾空白）
+        input_data = sys.stdin.buffer.read()
         
-        if not input_data:
+        if not input_data or input_data.isspace():
             result = {
                 "status": "error",
                 "error": "No input data received by the plugin."
             }
         else:
             # 解析JSON输入
-            request_data = json.loads(input_data)
+            request_data = loads(input_data)
             command = request_data.get('command')
 
             if not command:
@@ -59,8 +62,7 @@ def main():
         }
 
     # 输出结果到标准输出
-    print(json.dumps(result, ensure_ascii=False))
-    sys.stdout.flush()
+    emit(result)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
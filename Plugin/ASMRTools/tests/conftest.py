@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 测试直接导入插件目录下的asmr_core包
+PLUGIN_DIR = str(Path(__file__).resolve().parent.parent)
+if PLUGIN_DIR not in sys.path:
+    sys.path.insert(0, PLUGIN_DIR)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from asmr_core import asmr_api
+from asmr_core.asmr_api import ASMRAPIClient
+from asmr_core.config import ASMRConfig
+
+
+class FakeResponse:
+    def __init__(self, status, body=b""):
+        self.status = status
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """按顺序返回预设的响应，异常对象在进入请求时抛出"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(asmr_api, "backoff_delay", lambda attempt: 0)
+
+
+def request(session, max_retry=3):
+    config = ASMRConfig(username="", password="", download_path="")
+    client = ASMRAPIClient(config, session=session)
+    return asyncio.run(client._request("GET", "tracks/1", max_retry=max_retry))
+
+
+def test_returns_parsed_json():
+    session = FakeSession(FakeResponse(200, b'{"id": 1}'))
+    assert request(session) == {"id": 1}
+    assert session.calls == 1
+
+
+def test_retries_connection_errors():
+    session = FakeSession(
+        aiohttp.ClientOSError(104, "Connection reset by peer"),
+        aiohttp.ServerDisconnectedError(),
+        FakeResponse(200, b"[1, 2]"),
+    )
+    assert request(session) == [1, 2]
+    assert session.calls == 3
+
+
+def test_retries_timeouts_and_retryable_status():
+    session = FakeSession(asyncio.TimeoutError(), FakeResponse(503), FakeResponse(200, b"{}"))
+    assert request(session) == {}
+    assert session.calls == 3
+
+
+def test_gives_up_after_max_retry():
+    session = FakeSession(*[FakeResponse(502) for _ in range(3)])
+    assert request(session, max_retry=2) is None
+    assert session.calls == 3
+
+
+def test_invalid_json_returns_none_without_retry():
+    session = FakeSession(FakeResponse(200, b'{"id":'), FakeResponse(200, b"{}"))
+    assert request(session) is None
+    assert session.calls == 1
+
+
+def test_non_retryable_status_returns_none_without_retry():
+    session = FakeSession(FakeResponse(404), FakeResponse(200, b"{}"))
+    assert request(session) is None
+    assert session.calls == 1
+
+
+def test_other_client_errors_return_none_without_retry():
+    session = FakeSession(aiohttp.InvalidURL("bad url"), FakeResponse(200, b"{}"))
+    assert request(session) is None
+    assert session.calls == 1
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from asmr_core.progress_manager import ProgressManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    # 进度文件写入插件目录上两级的VCPAsyncResults
+    plugin_dir = tmp_path / "Plugin" / "ASMRTools"
+    plugin_dir.mkdir(parents=True)
+    return ProgressManager(str(plugin_dir))
+
+
+def read_progress(manager, task_id):
+    with open(manager.results_dir / f"ASMRTools-{task_id}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_results_dir_is_vcp_root(manager, tmp_path):
+    assert manager.results_dir == tmp_path / "VCPAsyncResults"
+    assert manager.results_dir.is_dir()
+
+
+def test_pending_updates_are_coalesced(manager, monkeypatch):
+    writes = []
+    original = ProgressManager._write_atomic
+    monkeypatch.setattr(
+        ProgressManager, "_write_atomic",
+        staticmethod(lambda target, payload: (writes.append(payload), original(target, payload))),
+    )
+
+    # 持有条件变量期间写入线程无法取走任务，三次更新只留下最后一次
+    with manager._pending_cond:
+        for progress in (10.0, 20.0, 30.0):
+            manager.update_progress("task", "Running", progress=progress)
+        assert list(manager._pending) == ["task"]
+
+    assert manager.flush()
+    assert len(writes) == 1
+    assert read_progress(manager, "task")["progress"] == 30.0
+
+
+def test_flush_writes_every_task(manager):
+    for task_id in ("a", "b", "c"):
+        manager.update_progress(task_id, "Running", progress=50.0)
+    assert manager.flush()
+    assert not manager._pending
+    for task_id in ("a", "b", "c"):
+        data = read_progress(manager, task_id)
+        assert data["requestId"] == task_id
+        assert data["status"] == "Running"
+    assert not list(manager.results_dir.glob("*.tmp"))
+
+
+def test_flush_without_pending_returns_immediately(manager):
+    assert manager.flush(timeout=0)
+
+
+def test_update_success_is_on_disk_when_it_returns(manager):
+    work_info = {"source_id": "RJ01", "title": "Work"}
+    result = {
+        "success_count": 2,
+        "total_tracks": 2,
+        "download_dir": "/tmp/work",
+        "completed_downloads": ["a.mp3", "b.mp3"],
+        "failed_downloads": [],
+    }
+    manager.update_progress("task", "Running", progress=99.0)
+    manager.update_success("task", work_info, result)
+
+    data = read_progress(manager, "task")
+    assert data["status"] == "Succeed"
+    assert data["progress"] == 100.0
+    assert data["completedFilesList"] == ["a.mp3", "b.mp3"]
+
+
+def test_update_failed_is_on_disk_when_it_returns(manager):
+    manager.update_failed("task", "boom", {"source_id": "RJ01", "title": "Work"})
+
+    data = read_progress(manager, "task")
+    assert data["status"] == "Failed"
+    assert data["reason"] == "boom"
+    assert data["workId"] == "RJ01"
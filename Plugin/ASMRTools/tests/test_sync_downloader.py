@@ -0,0 +1,54 @@
+from asmr_core.sync_downloader_simple import SyncDownloaderSimple
+
+TRACKS = [
+    {"type": "folder", "title": "MP3", "children": [
+        {"type": "audio", "title": "01.mp3", "size": 10, "mediaDownloadUrl": "https://x/01.mp3"},
+        {"type": "folder", "title": "SE", "children": [
+            {"type": "audio", "title": "02.mp3", "size": 20, "mediaDownloadUrl": "https://x/02.mp3"},
+        ]},
+    ]},
+    {"type": "folder", "title": "WAV", "children": [
+        {"type": "audio", "title": "01.wav", "size": 30, "mediaDownloadUrl": "https://x/01.wav"},
+    ]},
+    {"type": "text", "title": "readme?.txt", "size": 1, "mediaDownloadUrl": "https://x/readme.txt"},
+]
+
+
+def full_paths(files):
+    return [f"{f['path']}/{f['filename']}" if f["path"] else f["filename"] for f in files]
+
+
+def test_select_files_extracts_all_files_without_target():
+    files = SyncDownloaderSimple._select_files(TRACKS)
+    assert full_paths(files) == ["MP3/01.mp3", "MP3/SE/02.mp3", "WAV/01.wav", "readme_.txt"]
+
+
+def test_select_files_filters_by_folder():
+    files = SyncDownloaderSimple._select_files(TRACKS, "/MP3/")
+    assert full_paths(files) == ["MP3/01.mp3", "MP3/SE/02.mp3"]
+
+
+def test_select_files_reuses_extracted_list():
+    extracted = SyncDownloaderSimple._extract_files_from_tracks(TRACKS)
+    files = SyncDownloaderSimple._select_files([], "WAV", extracted=extracted)
+    assert full_paths(files) == ["WAV/01.wav"]
+    # 返回新列表，调用方修改结果不影响传入的列表
+    files.clear()
+    assert len(extracted) == 4
+
+
+def test_filter_files_by_path_matches_exact_file_and_multiple_targets():
+    files = SyncDownloaderSimple._extract_files_from_tracks(TRACKS)
+    selected = SyncDownloaderSimple._filter_files_by_path(files, ["MP3/SE/02.mp3", "WAV", "readme_.txt"])
+    assert full_paths(selected) == ["MP3/SE/02.mp3", "WAV/01.wav", "readme_.txt"]
+
+
+def test_filter_files_by_path_does_not_match_name_prefix():
+    files = [{"path": "MP3 (SE)", "filename": "01.mp3"}, {"path": "MP3", "filename": "02.mp3"}]
+    selected = SyncDownloaderSimple._filter_files_by_path(files, "MP3")
+    assert full_paths(selected) == ["MP3/02.mp3"]
+
+
+def test_filter_files_by_path_empty_target_matches_all():
+    files = SyncDownloaderSimple._extract_files_from_tracks(TRACKS)
+    assert SyncDownloaderSimple._filter_files_by_path(files, ["/", "WAV"]) == files
@@ -6,15 +6,46 @@
 
 import sys
 import re
-import requests
 from pathlib import Path
 
 # 添加当前目录到 Python 路径
 current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "missav_api_core"))
+for p in (str(current_dir), str(current_dir / "missav_api_core")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
 
-from consts import HEADERS
+from consts import SESSION, pick_headers
+from html_utils import extract_hrefs
+
+# 视频地址的正则，模块加载时编译一次
+_VIDEO_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'^/[A-Z]{2,6}-\d{2,4}$',
+        r'^/[A-Z]{2,6}-\d{2,4}(-[a-z-]+)?$',
+        r'^/\d{2,4}[A-Z]{2,6}-\d{2,4}$',
+        r'^/FC2-PPV-\d{6,8}$',
+        r'^/[A-Z]{1,4}\d{2,4}$',
+    )
+]
+
+# 容器标签扫描：(分桶名, 标签名, 属性名, 关键词)
+_OPEN_TAG_RE = re.compile(r'<(div|section|article|a)\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'\b(class|id)="([^"]*)"', re.IGNORECASE)
+_TAG_RULES = (
+    ("hot_div", "div", "class", ("hot", "popular", "trending", "featured")),
+    ("hot_section", "section", "class", ("hot", "popular", "trending")),
+    ("hot_id", "div", "id", ("hot", "popular", "trending")),
+    ("card_div", "div", "class", ("video", "item", "card", "movie")),
+    ("card_article", "article", "class", ("video", "item", "movie")),
+    ("card_link", "a", "class", ("video", "item", "movie")),
+)
+_CARD_LABELS = (
+    ("card_div", r'<div[^>]*class="[^"]*(?:video|item|card|movie)[^"]*"[^>]*>'),
+    ("card_article", r'<article[^>]*class="[^"]*(?:video|item|movie)[^"]*"[^>]*>'),
+    ("card_link", r'<a[^>]*class="[^"]*(?:video|item|movie)[^"]*"[^>]*href="[^"]*"[^>]*>'),
+)
+# 标题文本需要跨标签匹配，单独扫描
+_HOT_HEADING_RE = re.compile(r'<h[1-6][^>]*>.*?(?:热门|Hot|Popular|Trending).*?</h[1-6]>', re.IGNORECASE | re.DOTALL)
 
 
 def analyze_homepage_structure():
@@ -32,7 +63,7 @@ def analyze_homepage_structure():
         print(f"\n--- 分析 {url} ---")
         
         try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
+            response = SESSION.get(url, headers=pick_headers(), timeout=30)
             print(f"状态码: {response.status_code}")
             
             if response.status_code == 200:
@@ -51,33 +82,26 @@ def analyze_page_structure(content: str, url: str):
     """分析页面结构"""
     print("\n页面结构分析:")
     
-    # 1. 查找可能的热榜容器
-    hot_patterns = [
-        r'<div[^>]*class="[^"]*(?:hot|popular|trending|featured)[^"]*"[^>]*>',
-        r'<section[^>]*class="[^"]*(?:hot|popular|trending)[^"]*"[^>]*>',
-        r'<h[1-6][^>]*>.*?(?:热门|Hot|Popular|Trending).*?</h[1-6]>',
-        r'<div[^>]*id="[^"]*(?:hot|popular|trending)[^"]*"[^>]*>',
-    ]
+    # 1/2. 一次扫描所有开始标签，按规则归入热榜容器或视频卡片
+    buckets = _scan_container_tags(content)
     
-    for pattern in hot_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
+    # 查找可能的热榜容器
+    for key in ("hot_div", "hot_section", "hot_heading", "hot_id"):
+        if key == "hot_heading":
+            matches = _HOT_HEADING_RE.findall(content)
+        else:
+            matches = buckets[key]
         if matches:
             print(f"  找到热榜容器模式: {len(matches)} 个")
             for i, match in enumerate(matches[:3]):
                 print(f"    {i+1}. {match[:100]}...")
     
-    # 2. 查找视频卡片结构
-    card_patterns = [
-        r'<div[^>]*class="[^"]*(?:video|item|card|movie)[^"]*"[^>]*>',
-        r'<article[^>]*class="[^"]*(?:video|item|movie)[^"]*"[^>]*>',
-        r'<a[^>]*class="[^"]*(?:video|item|movie)[^"]*"[^>]*href="[^"]*"[^>]*>',
-    ]
-    
+    # 查找视频卡片结构
     total_cards = 0
-    for pattern in card_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
+    for key, label in _CARD_LABELS:
+        matches = buckets[key]
         if matches:
-            print(f"  视频卡片模式 '{pattern[:30]}...': {len(matches)} 个")
+            print(f"  视频卡片模式 '{label[:30]}...': {len(matches)} 个")
             total_cards += len(matches)
     
     print(f"  总视频卡片数: {total_cards}")
@@ -109,32 +133,47 @@ def analyze_page_structure(content: str, url: str):
             break
 
 
+def _scan_container_tags(content: str) -> dict:
+    """单次遍历页面中的div/section/article/a开始标签，按class/id关键词分桶"""
+    buckets = {key: [] for key, _, _, _ in _TAG_RULES}
+    
+    for m in _OPEN_TAG_RE.finditer(content):
+        tag_name = m.group(1).lower()
+        tag_text = m.group(0)
+        attrs = {name.lower(): value.lower() for name, value in _ATTR_RE.findall(tag_text)}
+        
+        for key, rule_tag, attr, keywords in _TAG_RULES:
+            if rule_tag != tag_name:
+                continue
+            value = attrs.get(attr)
+            if value is None or not any(keyword in value for keyword in keywords):
+                continue
+            if rule_tag == "a" and 'href="' not in tag_text:
+                continue
+            buckets[key].append(tag_text)
+    
+    return buckets
+
+
 def extract_video_links(content: str) -> list:
     """提取视频链接"""
-    # 提取所有链接
-    all_links = re.findall(r'href="([^"]*)"', content)
-    
-    # 过滤出可能的视频链接
+    # 过滤出可能的视频链接，按首次出现顺序去重
     video_links = []
-    video_patterns = [
-        r'^/[A-Z]{2,6}-\d{2,4}$',
-        r'^/[A-Z]{2,6}-\d{2,4}(-[a-z-]+)?$',
-        r'^/\d{2,4}[A-Z]{2,6}-\d{2,4}$',
-        r'^/FC2-PPV-\d{6,8}$',
-        r'^/[A-Z]{1,4}\d{2,4}$',
-    ]
+    seen = set()
     
-    for link in all_links:
+    for link in extract_hrefs(content):
+        if link in seen:
+            continue
+        
         # 移除查询参数
-        clean_link = link.split('?')[0]
+        clean_link = link.split('?', 1)[0]
         
         # 检查是否匹配视频模式
-        for pattern in video_patterns:
-            if re.match(pattern, clean_link, re.IGNORECASE):
-                video_links.append(link)
-                break
+        if any(pattern.match(clean_link) for pattern in _VIDEO_PATTERNS):
+            seen.add(link)
+            video_links.append(link)
     
-    return list(set(video_links))  # 去重
+    return video_links
 
 
 def analyze_video_card_structure():
@@ -142,7 +181,7 @@ def analyze_video_card_structure():
     print("\n=== 分析视频卡片结构 ===")
     
     try:
-        response = requests.get("https://missav.ws/dm22/en", headers=HEADERS, timeout=30)
+        response = SESSION.get("https://missav.ws/dm22/en", headers=pick_headers(), timeout=30)
         if response.status_code != 200:
             print("无法获取首页内容")
             return
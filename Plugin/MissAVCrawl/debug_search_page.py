@@ -6,16 +6,26 @@
 
 import sys
 import re
-import requests
 from pathlib import Path
 from urllib.parse import quote
 
 # 添加当前目录到 Python 路径
 current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "missav_api_core"))
+for p in (str(current_dir), str(current_dir / "missav_api_core")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
 
-from consts import HEADERS
+from consts import SESSION, pick_headers
+from html_utils import extract_hrefs
+
+# 视频代码的正则，模块加载时编译一次
+_VIDEO_CODE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'[A-Z]{2,6}-\d{2,4}',
+        r'\d{2,4}[A-Z]{2,6}-\d{2,4}',
+        r'FC2-PPV-\d{6,8}',
+    )
+]
 
 
 def analyze_search_page_structure():
@@ -41,7 +51,7 @@ def analyze_search_page_structure():
             print(f"\n测试URL: {search_url}")
             
             try:
-                response = requests.get(search_url, headers=HEADERS, timeout=30)
+                response = SESSION.get(search_url, headers=pick_headers(), timeout=30)
                 print(f"状态码: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -75,17 +85,17 @@ def analyze_page_content(content: str, keyword: str):
                 print(f"    示例: {matches[0][:100]}...")
     
     # 2. 查找所有链接
-    all_links = re.findall(r'href="([^"]*)"', content)
+    all_links = extract_hrefs(content)
     print(f"  总链接数: {len(all_links)}")
     
     # 3. 分析链接类型
     video_like_links = []
     other_links = []
+    needles = (keyword.lower(), 'ssis', 'ofje', 'stars')
     
     for link in all_links:
-        if any(pattern in link.lower() for pattern in [
-            keyword.lower(), 'ssis', 'ofje', 'stars'
-        ]):
+        lowered = link.lower()
+        if any(needle in lowered for needle in needles):
             video_like_links.append(link)
         else:
             other_links.append(link)
@@ -122,17 +132,11 @@ def analyze_page_content(content: str, keyword: str):
     
     # 6. 查找可能的视频代码模式
     print("\n  视频代码模式分析:")
-    video_code_patterns = [
-        r'[A-Z]{2,6}-\d{2,4}',
-        r'\d{2,4}[A-Z]{2,6}-\d{2,4}',
-        r'FC2-PPV-\d{6,8}',
-    ]
-    
-    for pattern in video_code_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
+    for pattern in _VIDEO_CODE_PATTERNS:
+        matches = pattern.findall(content)
         if matches:
-            unique_matches = list(set(matches))
-            print(f"    模式 '{pattern}': {len(unique_matches)} 个唯一匹配")
+            unique_matches = list(dict.fromkeys(matches))
+            print(f"    模式 '{pattern.pattern}': {len(unique_matches)} 个唯一匹配")
             for match in unique_matches[:5]:
                 print(f"      - {match}")
 
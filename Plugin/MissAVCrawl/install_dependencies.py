@@ -4,33 +4,34 @@
 MissAVCrawl Plugin 依赖安装脚本
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
 from pathlib import Path
 
-def install_package(package_name):
-    """安装Python包"""
+def install_packages(package_names):
+    """一次pip调用安装所有缺失的Python包"""
+    names = " ".join(package_names)
     try:
-        print(f"正在安装 {package_name}...")
-        result = subprocess.run([sys.executable, "-m", "pip", "install", package_name], 
+        print(f"正在安装 {names}...")
+        result = subprocess.run([sys.executable, "-m", "pip", "install", *package_names], 
                               capture_output=True, text=True)
         if result.returncode == 0:
-            print(f"✅ {package_name} 安装成功")
+            print(f"✅ {names} 安装成功")
             return True
         else:
-            print(f"❌ {package_name} 安装失败: {result.stderr}")
+            print(f"❌ {names} 安装失败: {result.stderr}")
             return False
     except Exception as e:
-        print(f"❌ 安装 {package_name} 时发生错误: {str(e)}")
+        print(f"❌ 安装 {names} 时发生错误: {str(e)}")
         return False
 
 def check_package(package_name):
-    """检查包是否已安装"""
+    """检查包是否已安装（只查找模块，不执行导入）"""
     try:
-        __import__(package_name)
-        return True
-    except ImportError:
+        return importlib.util.find_spec(package_name) is not None
+    except (ImportError, ValueError):
         return False
 
 def main():
@@ -45,15 +46,19 @@ def main():
         "urllib3"
     ]
     
-    # 检查和安装依赖
-    all_installed = True
+    # 检查依赖，收集缺失的包
+    missing = []
     for package in required_packages:
         if check_package(package.replace("-", "_")):
             print(f"✅ {package} 已安装")
         else:
-            print(f"⚠️  {package} 未安装，正在安装...")
-            if not install_package(package):
-                all_installed = False
+            print(f"⚠️  {package} 未安装")
+            missing.append(package)
+    
+    # 缺失的包合并为一次pip调用安装，共享解析器和下载会话
+    all_installed = True
+    if missing:
+        all_installed = install_packages(missing)
     
     print("\n" + "=" * 50)
     
@@ -11,19 +11,18 @@ import traceback
 from pathlib import Path
 
 # Ensure local modules can be imported
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
+current_dir = str(Path(__file__).parent)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
 
-# Import handlers for different command types
-from missav_crawl import process_request as handle_sync_request
-from missav_crawl_async import handle_async_download
+from plugin_io import loads, emit
 
 def main():
     """Main function to route commands."""
     try:
         # Read all input from stdin
-        input_data = sys.stdin.read().strip()
-        if not input_data:
+        input_data = sys.stdin.buffer.read()
+        if not input_data or input_data.isspace():
             # A plugin should always receive some input
             result = {
                 "status": "error",
@@ -31,7 +30,7 @@ def main():
             }
         else:
             # Parse the JSON input
-            request_data = json.loads(input_data)
+            request_data = loads(input_data)
             command = request_data.get('command')
 
             if not command:
@@ -44,11 +43,14 @@ def main():
                 # This is an asynchronous command.
                 # The handler will print the initial response and start a background thread.
                 # The main process will exit after that, so we don't capture a 'result' here.
+                # Handlers are imported lazily so each invocation only loads what it uses.
+                from missav_crawl_async import handle_async_download
                 handle_async_download(request_data)
                 return # Exit immediately after calling the async handler
             else:
                 # All other commands are considered synchronous.
                 # The handler will do its work and return a result dictionary.
+                from missav_crawl import process_request as handle_sync_request
                 result = handle_sync_request(request_data)
 
     except json.JSONDecodeError as e:
@@ -63,9 +65,8 @@ def main():
             "traceback": traceback.format_exc()
         }
 
-    # For synchronous commands, print the final result to stdout
-    print(json.dumps(result, ensure_ascii=False))
-    sys.stdout.flush()
+    # For synchronous commands, write the final result to stdout in one go
+    emit(result)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,39 @@
+import atexit
+import hashlib
+import random
 import re
+import types
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
 
-HEADERS = {
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# Prefer RE2 (linear-time, no backtracking) for the simple scraping patterns when installed
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# 可选Hyperscan：所有字段模式编译进同一数据库，一次SIMD扫描即可定位
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# urllib3 2.x在安装zstandard后可原生解码zstd，仅在能解码时才声明支持
+try:
+    from urllib3.util.request import ACCEPT_ENCODING as _URLLIB3_ENCODINGS
+except ImportError:
+    _URLLIB3_ENCODINGS = ""
+ACCEPT_ENCODING = "zstd, br, gzip, deflate" if "zstd" in _URLLIB3_ENCODINGS else "gzip, deflate, br"
+
+HEADERS = CaseInsensitiveDict({
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
     "Accept-Language": "en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7",
-    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Encoding": ACCEPT_ENCODING,
     "Cache-Control": "max-age=0",
     "Connection": "keep-alive",
     "Upgrade-Insecure-Requests": "1",
@@ -13,11 +43,191 @@ HEADERS = {
     "Sec-Fetch-User": "?1",
     "Referer": "https://www.missav.ws/",
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
+})
+
+# 轮换使用的User-Agent，条目数保持为2的幂以便按位掩码选取
+_UA_POOL = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+)
+# 导入时预先构建只读的请求头变体，每次请求直接取用，无需重新构建字典
+HEADER_VARIANTS = tuple(types.MappingProxyType({**HEADERS, "User-Agent": ua}) for ua in _UA_POOL)
+_UA_MASK = len(HEADER_VARIANTS) - 1
+
+
+def pick_headers() -> types.MappingProxyType:
+    """Return one of the prebuilt header variants at random"""
+    return HEADER_VARIANTS[random.getrandbits(3) & _UA_MASK]
+
+
+# 共享会话，复用连接池和TLS会话（keep-alive），脚本内请求统一走SESSION.get
+SESSION = Session()
+SESSION.headers.update(HEADERS)
+# 重试与退避交给urllib3在连接池内完成，状态码为429/5xx时自动重试并遵循Retry-After
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET"]),
+    raise_on_status=False,
+    respect_retry_after_header=True,
+)
+_ADAPTER = HTTPAdapter(max_retries=RETRY)
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+atexit.register(SESSION.close)
+
+
+# 页面中匹配的字面量均为ASCII，标准库re使用ASCII模式；RE2本身无需此标志
+_F = re.ASCII
+
+
+def _compile(pattern: str):
+    return re.compile(pattern, _F) if _re is re else _re.compile(pattern)
+
+
+# 模式末尾锚点：标准库re的$也匹配结尾换行之前，RE2的$只匹配文本末尾，显式补上可选换行
+_EOL = "$" if _re is re else r"\n?$"
+
+
+# 标签内的字段值是纯文本，用不跨行的否定字符类代替原来的(.*?)：与.一样不匹配换行，
+# 只在同一行内值中出现<时与惰性匹配结果不同，实际页面中这些值不含标签
+regex_title = _compile(r'<h1 class="text-base lg:text-lg text-nord6">([^<\n]*)</h1>')
+regex_title_search = regex_title.search
+regex_video_code = _compile(r'<span class="font-medium">([^<\n]*)</span>')
+regex_video_code_search = regex_video_code.search
+regex_publish_date = _compile(r'class="font-medium">([^<\n]*)</time>')
+regex_publish_date_search = regex_publish_date.search
+# 缩略图以多字符的cover-n.jpg结尾，无法用否定字符类表达，与m3u8一样保留惰性匹配
+regex_thumbnail = _compile(r'og:image" content="(.*?)cover-n.jpg')
+regex_thumbnail_search = regex_thumbnail.search
+# 打包后的JS片段内容不确定，m3u8保留惰性匹配
+regex_m3u8_js = _compile(r"'m3u8(.*?)video")
+regex_m3u8_js_search = regex_m3u8_js.search
+
+# 单次扫描页面提取除m3u8外的上述字段。各分支均为零宽前瞻，匹配互不消耗字符，
+# 因此重叠的字段（如video_code与publish_date共用class="font-medium">）
+# 仍与各自单独search的首个匹配结果一致。RE2不支持前瞻，此处固定使用标准库re
+PAGE_FIELDS_RE = re.compile(
+    r'(?=<h1 class="text-base lg:text-lg text-nord6">(?P<title>[^<\n]*)</h1>)'
+    r'|(?=<span class="font-medium">(?P<video_code>[^<\n]*)</span>)'
+    r'|(?=class="font-medium">(?P<publish_date>[^<\n]*)</time>)'
+    r'|(?=og:image" content="(?P<thumbnail>.*?)cover-n.jpg)',
+    _F,
+)
+_page_fields_finditer = PAGE_FIELDS_RE.finditer
+# 同一组模式的bytes版本，直接扫描原始响应体，只对捕获到的片段解码
+PAGE_FIELDS_BYTES_RE = re.compile(PAGE_FIELDS_RE.pattern.encode(), _F)
+_page_fields_bytes_finditer = PAGE_FIELDS_BYTES_RE.finditer
+PAGE_FIELDS = ("title", "video_code", "publish_date", "thumbnail", "m3u8_js")
+# m3u8由extract_m3u8按定界符切片提取，不参与正则扫描
+_SCAN_FIELDS = PAGE_FIELDS[:-1]
+
+
+_FIELD_REGEXES = (regex_title, regex_video_code, regex_publish_date, regex_thumbnail)
+_FIELD_BYTES_RE = tuple(re.compile(r.pattern.encode(), _F) for r in _FIELD_REGEXES)
+
+if hyperscan is not None:
+    # Hyperscan不支持捕获组，只用它找出每个字段的最左起点，再在该位置用re取出分组
+    _HS_DB = hyperscan.Database()
+    _HS_DB.compile(
+        expressions=[r.pattern for r in _FIELD_BYTES_RE],
+        ids=list(range(len(_SCAN_FIELDS))),
+        elements=len(_SCAN_FIELDS),
+        flags=hyperscan.HS_FLAG_SOM_LEFTMOST,
+    )
+else:
+    _HS_DB = None
+
+
+def _hs_scan(html: bytes) -> Dict[str, str]:
+    starts: List[Optional[int]] = [None] * len(_SCAN_FIELDS)
+
+    def on_match(idx: int, start: int, end: int, flags: int, context: object) -> None:
+        if starts[idx] is None:
+            starts[idx] = start
+
+    _HS_DB.scan(html, match_event_handler=on_match)
+    out: Dict[str, str] = {}
+    for idx, start in enumerate(starts):
+        if start is not None:
+            m = _FIELD_BYTES_RE[idx].match(html, start)
+            if m:
+                out[_SCAN_FIELDS[idx]] = m.group(1).decode("utf-8", "replace")
+    return out
+
+
+_M3U8_RE = re.compile(regex_m3u8_js.pattern, _F)
+_M3U8_BYTES_RE = re.compile(regex_m3u8_js.pattern.encode(), _F)
+
+
+def extract_m3u8(html: Union[str, bytes]) -> Union[str, bytes, None]:
+    """Return the packed m3u8 script between 'm3u8 and video, like regex_m3u8_js but via str.find"""
+    if isinstance(html, bytes):
+        opener, closer, newline, fallback = b"'m3u8", b"video", b"\n", _M3U8_BYTES_RE
+    else:
+        opener, closer, newline, fallback = "'m3u8", "video", "\n", _M3U8_RE
+    i = html.find(opener)
+    if i < 0:
+        return None
+    i += len(opener)
+    j = html.find(closer, i)
+    # 正则的.不跨行，定界符之间出现换行时交给正则从该位置继续查找
+    if j >= 0 and html.find(newline, i, j) < 0:
+        return html[i:j]
+    m = fallback.search(html, i - len(opener) + 1)
+    return m.group(1) if m else None
+
+
+def parse_page(html: Union[str, bytes]) -> Dict[str, str]:
+    """Scan the page (str or raw UTF-8 bytes) once and return the first match of every field that was found"""
+    if _HS_DB is not None:
+        out = _hs_scan(html.encode("utf-8") if isinstance(html, str) else html)
+    else:
+        is_bytes = isinstance(html, bytes)
+        out: Dict[str, str] = {}
+        for m in (_page_fields_bytes_finditer if is_bytes else _page_fields_finditer)(html):
+            name = m.lastgroup
+            if name not in out:
+                value = m.group(name)
+                out[name] = value.decode("utf-8", "replace") if is_bytes else value
+                if len(out) == len(_SCAN_FIELDS):
+                    break
+    m3u8_js = extract_m3u8(html)
+    if m3u8_js is not None:
+        out["m3u8_js"] = m3u8_js.decode("utf-8", "replace") if isinstance(m3u8_js, bytes) else m3u8_js
+    return out
+
+
+# 按页面内容摘要缓存解析结果，重试或重复打开同一视频页时跳过正则扫描
+PAGE_CACHE_SIZE = 256
+_page_cache: "OrderedDict[bytes, Dict[str, str]]" = OrderedDict()
+
+
+def _page_key(html: Union[str, bytes]) -> bytes:
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def parse_page_cached(html: Union[str, bytes]) -> Dict[str, str]:
+    """Same as parse_page, but reuses the result for a page that was already parsed"""
+    key = _page_key(html)
+    fields = _page_cache.get(key)
+    if fields is None:
+        fields = _page_cache[key] = parse_page(html)
+        if len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+    else:
+        _page_cache.move_to_end(key)
+    return dict(fields)
 
 
-regex_title = re.compile(r'<h1 class="text-base lg:text-lg text-nord6">(.*?)</h1>')
-regex_video_code = re.compile(r'<span class="font-medium">(.*?)</span>')
-regex_publish_date = re.compile(r'class="font-medium">(.*?)</time>')
-regex_thumbnail = re.compile(r'og:image" content="(.*?)cover-n.jpg')
-regex_m3u8_js = re.compile(r"'m3u8(.*?)video")
\ No newline at end of file
+def evict_page(html: Union[str, bytes]) -> None:
+    """Drop a page from the parse cache, e.g. once its video has been downloaded"""
+    _page_cache.pop(_page_key(html), None)
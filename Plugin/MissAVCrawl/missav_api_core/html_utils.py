@@ -0,0 +1,22 @@
+import re
+
+# 可选的C实现HTML解析器，未安装时回退到正则
+# selectolax 1.0起只提供lexbor后端，旧版本使用parser模块
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+# 链接的正则，模块加载时编译一次
+HREF_RE = re.compile(r'href="([^"]*)"')
+
+
+def extract_hrefs(content: str) -> list:
+    """提取页面中所有href属性"""
+    if HTMLParser is not None:
+        tree = HTMLParser(content)
+        return [node.attributes.get('href') or '' for node in tree.css('[href]')]
+    return HREF_RE.findall(content)
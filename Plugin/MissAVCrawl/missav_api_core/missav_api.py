@@ -1,17 +1,223 @@
 import os
+import re
+import sys
+import time
 import logging
+import threading
 import traceback
 
 from base_api import BaseCore
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import cached_property
 from base_api.base import setup_logger
 from base_api.modules.progress_bars import Callback
-from typing import Optional
+from typing import NamedTuple, Optional
+from urllib.parse import urljoin
 
 try:
     from consts import *
+    from consts import _compile, _EOL
+    from html_utils import HTMLParser, HREF_RE as _HREF_RE
 except (ModuleNotFoundError, ImportError):
     from .consts import *
+    from .consts import _compile, _EOL
+    from .html_utils import HTMLParser, HREF_RE as _HREF_RE
+
+# 网络配置位于插件根目录，模块加载时导入一次，不在每次获取页面时重复导入
+_PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PLUGIN_DIR not in sys.path:
+    sys.path.insert(0, _PLUGIN_DIR)
+try:
+    from network_config import network_config as _NETWORK_CONFIG
+except Exception:
+    _NETWORK_CONFIG = None
+
+# 搜索/热榜页面解析用到的正则，模块加载时编译一次
+_CARD_RES = [
+    re.compile(pattern, re.DOTALL | re.IGNORECASE) for pattern in (
+        # 寻找包含视频链接的div容器
+        r'<div[^>]*class="[^"]*(?:video|item|card)[^"]*"[^>]*>(.*?)</div>',
+        # 寻找列表项
+        r'<li[^>]*class="[^"]*(?:video|item)[^"]*"[^>]*>(.*?)</li>',
+        # 寻找文章标签
+        r'<article[^>]*>(.*?)</article>',
+    )
+]
+# 明显不是视频的URL，合并为一个分支表达式，每个URL只扫描一次
+# 以下URL判断用的分支表达式经_compile编译，安装了RE2时为线性时间匹配；
+# 末尾锚点用_EOL，忽略大小写用内联(?i)，两种引擎下匹配结果一致
+_EXCLUDE_RE = _compile("(?i)" + "|".join((
+    r'/search/', r'/category/', r'/tag/', r'/actress/',
+    r'/studio/', r'/series/', r'/page/', r'/login',
+    r'/register', r'/contact', r'/about', r'/api/',
+    r'/fonts/', r'/css/', r'/js/', r'/images/',
+    r'\.css', r'\.js', r'\.png', r'\.jpg', r'\.gif',
+    r'\.ico', r'\.woff', r'\.woff2', r'\.ttf',
+    r'/uncensored-leak' + _EOL, r'/chinese-subtitle' + _EOL,
+    r'/monthly-hot' + _EOL, r'/weekly-hot' + _EOL, r'/daily-hot' + _EOL,
+    r'/new' + _EOL, r'/popular' + _EOL, r'/trending' + _EOL,
+    r'/dm\d+/', r'/genres/', r'/studios/', r'/actresses/',
+)))
+# 精确的视频代码模式（基于日本AV命名规则）
+_VIDEO_CODES = "|".join((
+    # 标准格式：字母-数字 (如 SSIS-950, OFJE-505)
+    r'[A-Z]{2,6}-\d{2,4}',
+    # 带后缀的格式 (如 SSIS-950-uncensored)
+    r'[A-Z]{2,6}-\d{2,4}(?:-[a-z-]+)?',
+    # 数字开头的格式 (如 259LUXU-1234)
+    r'\d{2,4}[A-Z]{2,6}-\d{2,4}',
+    # 特殊格式 (如 FC2-PPV-1234567)
+    r'FC2-PPV-\d{6,8}',
+    # 其他常见格式，如 ABP123
+    r'[A-Z]{1,4}\d{2,4}',
+))
+_VIDEO_CODE_RE = _compile(rf'(?i)^/(?:{_VIDEO_CODES})' + _EOL)
+# 一次扫描整页，只捕获路径符合视频代码的href，与_is_video_url的路径规则一致：
+# 以/开头时整条路径须为/代码，否则取最后一段；查询参数忽略。
+# 不符合的href由第二个分支整体消耗（捕获为空串），与_HREF_RE的逐个匹配位置保持一致
+_VIDEO_HREF_RE = _compile(
+    rf'(?i)href="(?:((?:/|[^"?/][^"?]*/)?(?:{_VIDEO_CODES})\n?(?:\?[^"]*)?)|[^"]*)"'
+)
+# 无selectolax时一次扫描页面中所有<a>标签，建立href索引供各视频URL查找标题和缩略图
+_ANCHOR_RE = re.compile(r'<a\s([^>]*)>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+_IMG_RE = re.compile(r'<img\s([^>]*)>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_MISSAV_CODE_RE = _compile(r'\b[A-Z]{2,6}-\d{2,4}\b')
+
+# 页面特征词，预先转为小写并去重；str的in查找是C层的快速子串搜索，
+# 对小写副本逐个查找比单个忽略大小写的正则分支或Aho-Corasick都快
+_ERROR_INDICATORS = tuple(indicator.lower() for indicator in (
+    "404 Not Found",
+    "403 Forbidden",
+    "500 Internal Server Error",
+    "Access Denied",
+    "Page Not Found",
+    "Error 404",
+    "Error 403",
+    "Error 500",
+))
+_ERROR_INDICATORS_BYTES = tuple(indicator.encode() for indicator in _ERROR_INDICATORS)
+_MISSAV_INDICATORS = ("missav", "jav", "japanese adult video")
+
+# 重试等待时间表（秒），按尝试次数取值，超出部分沿用最后一项
+_BACKOFFS = (0.5, 1.0, 2.0, 4.0, 8.0)
+# 未加载网络配置时，重试过程的默认总时限（秒）
+DEFAULT_TOTAL_DEADLINE = 60
+
+
+def _backoff(attempt: int) -> float:
+    return _BACKOFFS[min(attempt, len(_BACKOFFS) - 1)]
+
+
+# 热榜可尝试的域名
+_HOT_BASE_URLS = (
+    "https://missav.ws",
+    "https://www.missav.ws",
+    "https://missav.com",
+    "https://www.missav.com",
+)
+# 热榜分类对应的URL路径
+_CATEGORY_PATHS = {
+    "daily": "/dm22/en",
+    "weekly": "/dm22/en?sort=weekly",
+    "monthly": "/dm22/en?sort=monthly",
+    "new": "/new",
+    "popular": "/popular",
+    "trending": "/trending",
+}
+# 热榜分类的中文名称
+_CATEGORY_NAMES = {
+    "daily": "每日热门",
+    "weekly": "每周热门",
+    "monthly": "每月热门",
+    "new": "最新",
+    "popular": "最受欢迎",
+    "trending": "趋势",
+}
+# 排序选项对应的URL参数
+_SORT_PARAMS = {
+    'saved': 'sort=saved',
+    'today_views': 'sort=today_views',
+    'weekly_views': 'sort=weekly_views',
+    'monthly_views': 'sort=monthly_views',
+    'views': 'sort=views',
+    'updated': 'sort=updated',
+    'released_at': 'sort=released_at',
+}
+
+# 多页搜索时并发获取页面的最大线程数
+MAX_FETCH_WORKERS = 8
+# Client按URL缓存的Video对象数量（每个对象持有完整页面内容）
+VIDEO_CACHE_SIZE = 64
+
+
+def _video_hrefs(html: str) -> list:
+    """Return the href values in html that _is_video_url would accept, in page order"""
+    return [link for link in _VIDEO_HREF_RE.findall(html) if link and not _EXCLUDE_RE.search(link)]
+
+
+def _index_anchors(html: str) -> dict:
+    """Scan html once and map each href to its anchors as (text, title, img alt, img src) tuples, in page order"""
+    index = {}
+    for attrs, inner in _ANCHOR_RE.findall(html):
+        attrs = {name.lower(): value for name, value in _ATTR_RE.findall(attrs)}
+        href = attrs.get('href')
+        if not href:
+            continue
+        img = _IMG_RE.search(inner)
+        img_attrs = {name.lower(): value for name, value in _ATTR_RE.findall(img.group(1))} if img else {}
+        index.setdefault(href, []).append((
+            _TAG_RE.sub('', inner).strip(),
+            attrs.get('title'),
+            img_attrs.get('alt'),
+            img_attrs.get('src') or img_attrs.get('data-src'),
+        ))
+    return index
+
+
+_BLOCK_TAGS = frozenset(('div', 'article', 'li', 'section'))
+
+
+def _index_video_blocks(html: str) -> dict:
+    """Scan html once and map each href to the smallest container block around its anchor"""
+    blocks = {}
+    if HTMLParser is not None:
+        # 每个链接向上找到最近的div/article/li/section容器
+        for anchor in HTMLParser(html).css('a[href]'):
+            href = anchor.attributes.get('href')
+            if not href or href in blocks:
+                continue
+            node = anchor.parent
+            while node is not None and node.tag not in _BLOCK_TAGS:
+                node = node.parent
+            blocks[href] = (node if node is not None else anchor).html
+        return blocks
+    
+    # 无解析器时先按视频卡片归属链接（取最短的卡片），不在卡片中的链接取前后500字符
+    for card_re in _CARD_RES:
+        for card in card_re.finditer(html):
+            block = card.group(0)
+            for href in _HREF_RE.findall(block):
+                if href not in blocks or len(block) < len(blocks[href]):
+                    blocks[href] = block
+    for m in _ANCHOR_RE.finditer(html):
+        href = _ATTR_RE.findall(m.group(1))
+        href = next((value for name, value in href if name.lower() == 'href'), None)
+        if href and href not in blocks:
+            blocks[href] = html[max(0, m.start() - 500):m.end() + 500]
+    return blocks
+
+
+class VideoSummary(NamedTuple):
+    """A search hit; kept as a tuple while parsing and turned into a dict only for returned results"""
+    url: str
+    video_code: str
+    title: str
+    thumbnail: str = ""
+    duration: str = ""
+    publish_date: str = ""
 
 
 class Video:
@@ -20,27 +226,20 @@ class Video:
         self.core = core
         self.logger = setup_logger(name="MISSAV API - [Video]", log_file=None, level=logging.CRITICAL)
         
-        # 获取页面内容，带重试机制
-        self.content = self._fetch_with_retry(url, max_retries=3)
+        # 原始响应体（bytes），用于直接扫描页面字段
+        self._body = None
+        # 获取页面内容，带重试机制；只拿到字节时，解码推迟到首次访问content
+        content = self._fetch_with_retry(url, max_retries=3)
+        if content is not None:
+            self.content = content
 
-    def _fetch_with_retry(self, url: str, max_retries: int = None) -> str:
-        """带重试机制的页面获取"""
-        import time
-        
-        # 导入网络配置
-        try:
-            import sys
-            from pathlib import Path
-            current_dir = Path(__file__).parent.parent
-            sys.path.insert(0, str(current_dir))
-            from network_config import network_config
-            
-            if max_retries is None:
-                max_retries = network_config.get("MAX_RETRIES", 3)
-        except:
-            if max_retries is None:
-                max_retries = 3
-            network_config = None
+    def _fetch_with_retry(self, url: str, max_retries: int = None) -> Optional[str]:
+        """带重试机制的页面获取，只保留了原始字节时返回None"""
+        network_config = _NETWORK_CONFIG
+        if max_retries is None:
+            max_retries = network_config.get("MAX_RETRIES", 3) if network_config else 3
+        total_deadline = network_config.get("TOTAL_DEADLINE", DEFAULT_TOTAL_DEADLINE) if network_config else DEFAULT_TOTAL_DEADLINE
+        deadline = time.monotonic() + total_deadline
         
         last_error = None
         
@@ -57,6 +256,7 @@ class Video:
                     raise ValueError("fetch 方法返回 None")
                 
                 content = None
+                body = getattr(raw_content, 'content', None)
                 if hasattr(raw_content, 'text'):
                     # 如果是 Response 对象，获取文本内容
                     content = raw_content.text
@@ -66,18 +266,15 @@ class Video:
                             network_config.debug_print(f"HTTP 状态码: {raw_content.status_code}")
                         if raw_content.status_code != 200:
                             raise ValueError(f"HTTP 错误: {raw_content.status_code}")
-                elif hasattr(raw_content, 'content'):
-                    # 如果有 content 属性
-                    if isinstance(raw_content.content, bytes):
-                        content = raw_content.content.decode('utf-8')
-                    else:
-                        content = str(raw_content.content)
+                elif isinstance(body, bytes):
+                    # 只有字节内容时直接校验，不整页解码
+                    content = body
                 elif isinstance(raw_content, str):
                     # 如果直接是字符串
                     content = raw_content
                 else:
-                    # 其他情况，尝试转换为字符串
-                    content = str(raw_content)
+                    # 其他类型转为字符串只会得到对象的repr，不是页面内容
+                    raise TypeError(f"unsupported fetch return type: {type(raw_content)!r}")
                 
                 # 验证内容是否有效
                 if not content or len(content.strip()) == 0:
@@ -90,8 +287,12 @@ class Video:
                 if network_config:
                     network_config.debug_print(f"成功获取页面内容，长度: {len(content)}")
                 
-                return content
+                self._body = body if isinstance(body, bytes) else None
+                return content if isinstance(content, str) else None
                 
+            except TypeError:
+                # 返回类型不受支持，重试也无济于事
+                raise
             except Exception as e:
                 last_error = e
                 error_msg = f"第 {attempt + 1} 次获取页面失败: {str(e)}"
@@ -100,12 +301,15 @@ class Video:
                 if network_config:
                     network_config.debug_print(error_msg)
                 
-                if attempt < max_retries - 1:
+                # 超过总时限后不再等待重试
+                remaining = deadline - time.monotonic()
+                if attempt < max_retries - 1 and remaining > 0:
                     # 计算等待时间
                     if network_config:
                         wait_time = network_config.get_retry_delay(attempt)
                     else:
-                        wait_time = (2 ** attempt) * 1
+                        wait_time = _backoff(attempt)
+                    wait_time = min(wait_time, remaining)
                     
                     retry_msg = f"等待 {wait_time} 秒后重试..."
                     self.logger.info(retry_msg)
@@ -125,89 +329,93 @@ class Video:
         
         raise ValueError(error_msg)
     
-    def _is_error_page(self, content: str) -> bool:
-        """检查是否是错误页面"""
-        error_indicators = [
-            "404 Not Found",
-            "403 Forbidden",
-            "500 Internal Server Error",
-            "Access Denied",
-            "Page Not Found",
-            "Error 404",
-            "Error 403",
-            "Error 500"
-        ]
-        
+    def _is_error_page(self, content) -> bool:
+        """检查是否是错误页面（content可为str或bytes）"""
         content_lower = content.lower()
-        return any(indicator.lower() in content_lower for indicator in error_indicators)
+        indicators = _ERROR_INDICATORS_BYTES if isinstance(content, bytes) else _ERROR_INDICATORS
+        return any(indicator in content_lower for indicator in indicators)
 
     def enable_logging(self, level, log_file: str = None):
         self.logger = setup_logger(name="MISSAV API - [Video]", log_file=log_file, level=level)
 
+    @cached_property
+    def _page_fields(self) -> dict:
+        """Scans the page once for title, code, date, thumbnail and m3u8 script"""
+        return parse_page_cached(self._page_source)
+
+    @property
+    def _page_source(self):
+        return self._body if self._body is not None else self.content
+
+    @cached_property
+    def content(self) -> str:
+        """Page text, decoded from the raw body on first access when only bytes were kept"""
+        return self._body.decode('utf-8', 'replace')
+
     @cached_property
     def title(self) -> str:
         """Returns the title of the video. Language depends on the URL language"""
-        if not self.content:
+        if not self._page_source:
             raise ValueError("页面内容为空，无法提取视频标题")
         
-        match = regex_title.search(self.content)
-        if not match:
+        title = self._page_fields.get("title")
+        if title is None:
             raise ValueError("无法找到视频标题信息，可能是URL无效或页面结构已变化")
-        return match.group(1)
+        return title
 
     @cached_property
     def video_code(self) -> str:
         """Returns the specific video code"""
-        if not self.content:
+        if not self._page_source:
             raise ValueError("页面内容为空，无法提取视频代码")
         
-        match = regex_video_code.search(self.content)
-        if not match:
+        video_code = self._page_fields.get("video_code")
+        if video_code is None:
             raise ValueError("无法找到视频代码信息，可能是URL无效或页面结构已变化")
-        return match.group(1)
+        return video_code
 
     @cached_property
     def publish_date(self) -> str:
         """Returns the publication date of the video"""
-        if not self.content:
+        if not self._page_source:
             raise ValueError("页面内容为空，无法提取发布日期")
         
-        match = regex_publish_date.search(self.content)
-        if not match:
+        publish_date = self._page_fields.get("publish_date")
+        if publish_date is None:
             raise ValueError("无法找到视频发布日期信息，可能是URL无效或页面结构已变化")
-        return match.group(1)
+        return publish_date
 
     @cached_property
     def m3u8_base_url(self) -> str:
         """Returns the m3u8 base URL (master playlist)"""
-        if not self.content:
+        if not self._page_source:
             raise ValueError("页面内容为空，无法提取m3u8链接")
         
-        match = regex_m3u8_js.search(self.content)
-        if not match:
+        javascript_content = self._page_fields.get("m3u8_js")
+        if javascript_content is None:
             raise ValueError("无法找到m3u8播放列表信息，可能是URL无效或页面结构已变化")
         
-        javascript_content = match.group(1)
-        url_parts = javascript_content.split("|")[::-1]
+        # URL片段在打包字符串中是倒序排列的，直接用负索引读取，无需先反转列表
+        url_parts = javascript_content.split("|")
         
         if len(url_parts) < 9:
             raise ValueError("m3u8 URL构建信息不完整，无法生成播放链接")
         
         self.logger.debug(f"Constructing HLS URL from: {url_parts}")
-        url = f"{url_parts[1]}://{url_parts[2]}.{url_parts[3]}/{url_parts[4]}-{url_parts[5]}-{url_parts[6]}-{url_parts[7]}-{url_parts[8]}/playlist.m3u8"
+        url = f"{url_parts[-2]}://{url_parts[-3]}.{url_parts[-4]}/{url_parts[-5]}-{url_parts[-6]}-{url_parts[-7]}-{url_parts[-8]}-{url_parts[-9]}/playlist.m3u8"
         self.logger.debug(f"Final URL: {url}")
         return url
 
     @cached_property
     def thumbnail(self) -> str:
         """Returns the main video thumbnail"""
-        if not self.content:
+        if not self._page_source:
             return ""  # 如果没有内容，返回空字符串
         
-        match = regex_thumbnail.search(self.content)
-        if not match:
+        thumbnail = self._page_fields.get("thumbnail")
+        if thumbnail is None:
             return ""  # 如果找不到缩略图，返回空字符串而不是抛出错误
-        return f"{match.group(1)}cover-n.jpg"
+        return f"{thumbnail}cover-n.jpg"
 
     def get_segments(self, quality: str) -> list:
         """Returns the list of HLS segments for a given quality"""
@@ -223,6 +431,7 @@ class Video:
         try:
             self.core.download(video=self, quality=quality, path=path, callback=callback, downloader=downloader,
                                remux=remux, callback_remux=remux_callback)
+            evict_page(self._page_source)
             return True
 
         except Exception:
@@ -255,10 +464,64 @@ class Client:
             logger = logging.getLogger(__name__)
             logger.warning(f"会话初始化失败: {str(e)}")
             pass
+        
+        # 上次成功获取热榜的域名，之后优先尝试，避免每次都在多个域名间重新建连
+        self._hot_base_url = None
+        
+        # 按URL缓存的Video对象，重复访问同一视频时不再重新获取和解析页面
+        self._video_cache = OrderedDict()
+        self._video_cache_lock = threading.Lock()
 
     def get_video(self, url: str) -> Video:
-        """Returns the video object"""
-        return Video(url, core=self.core)
+        """Returns the video object, reusing the one already built for this URL"""
+        with self._video_cache_lock:
+            video = self._video_cache.get(url)
+            if video is not None:
+                self._video_cache.move_to_end(url)
+                return video
+        
+        video = Video(url, core=self.core)
+        with self._video_cache_lock:
+            self._video_cache[url] = video
+            if len(self._video_cache) > VIDEO_CACHE_SIZE:
+                self._video_cache.popitem(last=False)
+        return video
+    
+    def _fetch(self, url: str) -> str:
+        """通过核心的共享会话获取页面文本，连接在会话内复用"""
+        response = self.core.fetch(url)
+        if hasattr(response, 'text'):
+            return response.text
+        if isinstance(response, str):
+            return response
+        # 其他类型转为字符串只会得到对象的repr，不是页面内容
+        raise TypeError(f"unsupported fetch return type: {type(response)!r}")
+    
+    def _iter_fetched(self, urls: list):
+        """并发获取多个页面，按传入顺序产出 (url, content, error)；提前停止迭代时取消未开始的请求"""
+        if len(urls) <= 1:
+            for url in urls:
+                try:
+                    yield url, self._fetch(url), None
+                except Exception as e:
+                    yield url, None, e
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(urls)))
+        futures = []
+        try:
+            futures.extend(executor.submit(self._fetch, url) for url in urls)
+            for url, future in zip(urls, futures):
+                try:
+                    content, error = future.result(), None
+                except Exception as e:
+                    content, error = None, e
+                yield url, content, error
+        finally:
+            # 逐个取消未开始的请求（shutdown的cancel_futures参数需要Python 3.9）
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
     
     def search_videos_enhanced_with_retry(self, keyword: str, page: int = 1, sort: str = None,
                                          include_cover: bool = True, include_title: bool = True,
@@ -279,10 +542,13 @@ class Client:
         Returns:
             包含搜索结果的字典
         """
-        import time
         import random
         
         last_error = None
+        # 抖动系数每次调用只取一次，避免多个客户端同步重试
+        jitter = 0.9 + 0.2 * random.random()
+        total_deadline = _NETWORK_CONFIG.get("TOTAL_DEADLINE", DEFAULT_TOTAL_DEADLINE) if _NETWORK_CONFIG else DEFAULT_TOTAL_DEADLINE
+        deadline = time.monotonic() + total_deadline
         
         for attempt in range(max_retries):
             try:
@@ -300,11 +566,11 @@ class Client:
                 if result.get("success") and result.get("total_count", 0) > 0:
                     return result
                 
-                # 如果搜索成功但没有结果，且还有重试次数
-                if result.get("success") and attempt < max_retries - 1:
-                    # 等待一段时间后重试，使用随机延迟避免被限制
-                    wait_time = random.uniform(1, 3) + attempt * 0.5
-                    time.sleep(wait_time)
+                # 如果搜索成功但没有结果，且还有重试次数和剩余时间
+                remaining = deadline - time.monotonic()
+                if result.get("success") and attempt < max_retries - 1 and remaining > 0:
+                    # 等待一段时间后重试，使用抖动延迟避免被限制
+                    time.sleep(min(_backoff(attempt) * jitter, remaining))
                     continue
                 
                 # 如果是最后一次尝试或搜索失败，返回结果
@@ -312,10 +578,10 @@ class Client:
                 
             except Exception as e:
                 last_error = e
-                if attempt < max_retries - 1:
+                remaining = deadline - time.monotonic()
+                if attempt < max_retries - 1 and remaining > 0:
                     # 等待后重试
-                    wait_time = random.uniform(2, 5) + attempt * 1.0
-                    time.sleep(wait_time)
+                    time.sleep(min(_backoff(attempt + 1) * jitter, remaining))
                     continue
                 else:
                     # 最后一次尝试失败
@@ -356,39 +622,36 @@ class Client:
             all_results = []
             actual_pages = 0
             
-            # 多页搜索
+            # 多页搜索：先构造所有页的URL，关键词编码和排序参数各页相同，只计算一次
+            base_url = "https://missav.ws"
+            base_search_url = f"{base_url}/search/{quote(keyword)}"
+            sort_param = self._get_sort_parameter(sort) if sort else ""
+            search_urls = []
             for current_page in range(page, page + max_pages):
+                # 构造搜索URL
+                search_url = base_search_url
+                
+                # 添加页码参数
+                url_params = []
+                if current_page > 1:
+                    url_params.append(f"page={current_page}")
+                
+                # 添加排序参数
+                if sort_param:
+                    url_params.append(sort_param)
+                
+                # 组合URL参数
+                if url_params:
+                    search_url += "?" + "&".join(url_params)
+                search_urls.append(search_url)
+            
+            # 并发获取各页，按页码顺序解析
+            for search_url, content, error in self._iter_fetched(search_urls):
+                if error is not None:
+                    # 记录错误但继续下一页
+                    continue
+                
                 try:
-                    # 构造搜索URL
-                    base_url = "https://missav.ws"
-                    search_url = f"{base_url}/search/{quote(keyword)}"
-                    
-                    # 添加页码参数
-                    url_params = []
-                    if current_page > 1:
-                        url_params.append(f"page={current_page}")
-                    
-                    # 添加排序参数
-                    if sort:
-                        sort_param = self._get_sort_parameter(sort)
-                        if sort_param:
-                            url_params.append(sort_param)
-                    
-                    # 组合URL参数
-                    if url_params:
-                        search_url += "?" + "&".join(url_params)
-                    
-                    # 使用核心的fetch方法获取搜索页面
-                    response = self.core.fetch(search_url)
-                    
-                    # 处理响应内容
-                    if hasattr(response, 'text'):
-                        content = response.text
-                    elif isinstance(response, str):
-                        content = response
-                    else:
-                        content = str(response)
-                    
                     if not content:
                         break
                     
@@ -464,16 +727,8 @@ class Client:
             if page > 1:
                 search_url += f"?page={page}"
             
-            # 使用核心的fetch方法获取搜索页面
-            response = self.core.fetch(search_url)
-            
-            # 处理响应内容
-            if hasattr(response, 'text'):
-                content = response.text
-            elif isinstance(response, str):
-                content = response
-            else:
-                content = str(response)
+            # 通过核心的共享会话获取搜索页面
+            content = self._fetch(search_url)
             
             if not content:
                 raise ValueError("搜索页面内容为空")
@@ -501,20 +756,29 @@ class Client:
     
     def _parse_search_results(self, html_content: str, keyword: str, base_url: str) -> list:
         """解析搜索结果页面"""
-        import re
-        from urllib.parse import urljoin
-        
         results = []
         
         try:
-            # 更精确的搜索结果解析
-            # 首先尝试找到搜索结果容器
-            video_urls = self._extract_video_urls_from_search_page(html_content, base_url, keyword)
+            if HTMLParser is not None:
+                # 解析器可用时一次遍历页面，链接、标题和缩略图同时取得
+                anchors = self._collect_video_anchors(html_content, base_url)
+                summaries = list(anchors.values())[:15]  # 限制为15个结果
+            else:
+                # 更精确的搜索结果解析
+                # 首先尝试找到搜索结果容器
+                video_urls = self._extract_video_urls_from_search_page(html_content, base_url, keyword)
+                
+                # 页面只扫描一次建立链接索引，每个视频URL在索引中查找详细信息
+                anchors = _index_anchors(html_content)
+                summaries = (
+                    self._extract_video_info_from_search_page(url, anchors, base_url)
+                    for url in video_urls[:15]  # 限制为15个结果
+                )
             
-            # 为每个视频URL提取详细信息
-            for url in video_urls[:15]:  # 限制为15个结果
-                video_info = self._extract_video_info_from_search_page(url, html_content, base_url)
-                if video_info and self._is_relevant_result(video_info, keyword):
+            # 只有最终返回的结果才转换为dict
+            for summary in summaries:
+                video_info = summary._asdict()
+                if self._is_relevant_result(video_info, keyword):
                     results.append(video_info)
             
         except Exception as e:
@@ -523,45 +787,65 @@ class Client:
         
         return results
     
+    def _collect_video_anchors(self, html_content: str, base_url: str) -> dict:
+        """用selectolax遍历一次页面中的链接，按出现顺序返回 {视频URL: VideoSummary}"""
+        found = {}
+        for anchor in HTMLParser(html_content).css('a[href]'):
+            link = anchor.attributes.get('href') or ''
+            if not self._is_video_url(link):
+                continue
+            if link.startswith('/'):
+                link = urljoin(base_url, link)
+            
+            video_code = link.split('/')[-1].split('?')[0]
+            # 默认使用视频代码作为标题
+            summary = found.get(link) or VideoSummary(link, video_code, video_code)
+            title, thumbnail = summary.title, summary.thumbnail
+            
+            img = anchor.css_first('img')
+            # 标题依次取链接文本、title属性、封面图alt，须比视频代码长
+            if title == video_code:
+                for candidate in (anchor.text(strip=True), anchor.attributes.get('title'),
+                                  img.attributes.get('alt') if img is not None else None):
+                    candidate = (candidate or '').strip()
+                    if len(candidate) > len(video_code):
+                        title = candidate
+                        break
+            
+            # 缩略图取链接内的封面图
+            if not thumbnail and img is not None:
+                thumbnail = img.attributes.get('src') or img.attributes.get('data-src') or ''
+                if thumbnail.startswith('/'):
+                    thumbnail = urljoin(base_url, thumbnail)
+            
+            found[link] = summary._replace(title=title, thumbnail=thumbnail)
+        return found
+    
     def _extract_video_urls_from_search_page(self, html_content: str, base_url: str, keyword: str) -> list:
         """从搜索页面提取视频URL"""
-        import re
-        from urllib.parse import urljoin
-        
         video_urls = []
+        seen = set()
         
-        # 方法1: 寻找视频卡片或列表项
-        card_patterns = [
-            # 寻找包含视频链接的div容器
-            r'<div[^>]*class="[^"]*(?:video|item|card)[^"]*"[^>]*>(.*?)</div>',
-            # 寻找列表项
-            r'<li[^>]*class="[^"]*(?:video|item)[^"]*"[^>]*>(.*?)</li>',
-            # 寻找文章标签
-            r'<article[^>]*>(.*?)</article>',
-        ]
+        def add_links(html):
+            for link in _video_hrefs(html):
+                if link.startswith('/'):
+                    link = urljoin(base_url, link)
+                # 边扫描边去重（保持顺序），重复链接不进入结果列表
+                if link not in seen:
+                    seen.add(link)
+                    video_urls.append(link)
         
-        for pattern in card_patterns:
-            cards = re.findall(pattern, html_content, re.DOTALL | re.IGNORECASE)
-            for card in cards:
-                # 从每个卡片中提取链接
-                link_matches = re.findall(r'href="([^"]*)"', card)
-                for link in link_matches:
-                    if self._is_video_url(link):
-                        if link.startswith('/'):
-                            link = urljoin(base_url, link)
-                        video_urls.append(link)
+        # 方法1: 寻找视频卡片或列表项
+        for card_re in _CARD_RES:
+            for card in card_re.findall(html_content):
+                # 从每个卡片中提取视频链接
+                add_links(card)
         
         # 方法2: 如果上述方法没找到结果，使用更广泛的搜索
         if not video_urls:
-            all_links = re.findall(r'href="([^"]*)"', html_content)
-            for link in all_links:
-                if self._is_video_url(link):
-                    if link.startswith('/'):
-                        link = urljoin(base_url, link)
-                    video_urls.append(link)
+            add_links(html_content)
         
-        # 去重并返回
-        return list(dict.fromkeys(video_urls))  # 保持顺序的去重
+        return video_urls
     
     def _is_relevant_result(self, video_info: dict, keyword: str) -> bool:
         """检查搜索结果是否与关键词相关"""
@@ -589,39 +873,9 @@ class Client:
     
     def _is_video_url(self, url: str) -> bool:
         """判断是否是视频页面URL"""
-        import re
-        
         # 首先排除明显不是视频的URL
-        exclude_patterns = [
-            r'/search/', r'/category/', r'/tag/', r'/actress/',
-            r'/studio/', r'/series/', r'/page/', r'/login',
-            r'/register', r'/contact', r'/about', r'/api/',
-            r'/fonts/', r'/css/', r'/js/', r'/images/',
-            r'\.css', r'\.js', r'\.png', r'\.jpg', r'\.gif', 
-            r'\.ico', r'\.woff', r'\.woff2', r'\.ttf',
-            r'/uncensored-leak$', r'/chinese-subtitle$',
-            r'/monthly-hot$', r'/weekly-hot$', r'/daily-hot$',
-            r'/new$', r'/popular$', r'/trending$',
-            r'/dm\d+/', r'/genres/', r'/studios/', r'/actresses/'
-        ]
-        
-        for pattern in exclude_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return False
-        
-        # 精确的视频代码模式（基于日本AV命名规则）
-        video_patterns = [
-            # 标准格式：字母-数字 (如 SSIS-950, OFJE-505)
-            r'^/[A-Z]{2,6}-\d{2,4}$',
-            # 带后缀的格式 (如 SSIS-950-uncensored)
-            r'^/[A-Z]{2,6}-\d{2,4}(-[a-z-]+)?$',
-            # 数字开头的格式 (如 259LUXU-1234)
-            r'^/\d{2,4}[A-Z]{2,6}-\d{2,4}$',
-            # 特殊格式 (如 FC2-PPV-1234567)
-            r'^/FC2-PPV-\d{6,8}$',
-            # 其他常见格式
-            r'^/[A-Z]{1,4}\d{2,4}$',  # 如 ABP123
-        ]
+        if _EXCLUDE_RE.search(url):
+            return False
         
         # 提取URL路径部分
         url_path = url.split('?')[0]  # 移除查询参数
@@ -629,77 +883,31 @@ class Client:
             url_path = '/' + url_path.split('/')[-1]
         
         # 检查是否匹配视频代码模式
-        for pattern in video_patterns:
-            if re.match(pattern, url_path, re.IGNORECASE):
-                return True
-        
-        return False
+        return _VIDEO_CODE_RE.match(url_path) is not None
     
-    def _extract_video_info_from_search_page(self, url: str, html_content: str, base_url: str) -> dict:
-        """从搜索页面中提取视频信息"""
-        import re
-        from urllib.parse import urljoin
+    def _extract_video_info_from_search_page(self, url: str, anchors: dict, base_url: str) -> VideoSummary:
+        """从搜索页面的链接索引（_index_anchors的结果）中提取视频信息"""
+        # 从URL提取视频代码，默认使用视频代码作为标题
+        video_code = url.split('/')[-1].split('?')[0]
+        title, thumbnail = video_code, ""
+        
+        # 页面中的链接可能是相对路径，也可能是完整URL
+        entries = anchors.get(url.replace(base_url, '')) or anchors.get(url) or ()
+        
+        # 标题依次取链接文本、title属性、封面图alt，须比视频代码长
+        for entry in entries:
+            candidate = next((t.strip() for t in entry[:3] if t and len(t.strip()) > len(video_code)), None)
+            if candidate:
+                title = candidate
+                break
         
-        try:
-            # 从URL提取视频代码
-            video_code = url.split('/')[-1].split('?')[0]
-            
-            video_info = {
-                "url": url,
-                "video_code": video_code,
-                "title": video_code,  # 默认使用视频代码作为标题
-                "thumbnail": "",
-                "duration": "",
-                "publish_date": ""
-            }
-            
-            # 尝试从HTML中提取更详细的信息
-            # 查找包含该视频链接的区域
-            url_escaped = re.escape(url.replace(base_url, ''))
-            
-            # 寻找标题
-            title_patterns = [
-                rf'<a[^>]*href="{url_escaped}"[^>]*[^>]*>([^<]+)</a>',
-                rf'<a[^>]*href="{url_escaped}"[^>]*title="([^"]*)"',
-                rf'alt="([^"]*)"[^>]*.*?href="{url_escaped}"',
-                rf'title="([^"]*)"[^>]*.*?href="{url_escaped}"'
-            ]
-            
-            for pattern in title_patterns:
-                match = re.search(pattern, html_content, re.IGNORECASE | re.DOTALL)
-                if match:
-                    title = match.group(1).strip()
-                    if title and len(title) > len(video_code):
-                        video_info["title"] = title
-                        break
-            
-            # 尝试提取缩略图
-            thumbnail_patterns = [
-                rf'<img[^>]*src="([^"]*)"[^>]*.*?href="{url_escaped}"',
-                rf'href="{url_escaped}"[^>]*.*?<img[^>]*src="([^"]*)"'
-            ]
-            
-            for pattern in thumbnail_patterns:
-                match = re.search(pattern, html_content, re.DOTALL)
-                if match:
-                    thumbnail = match.group(1)
-                    if thumbnail.startswith('/'):
-                        thumbnail = urljoin(base_url, thumbnail)
-                    video_info["thumbnail"] = thumbnail
-                    break
-            
-            return video_info
-            
-        except Exception as e:
-            # 返回基本信息
-            return {
-                "url": url,
-                "video_code": url.split('/')[-1].split('?')[0],
-                "title": url.split('/')[-1].split('?')[0],
-                "thumbnail": "",
-                "duration": "",
-                "publish_date": ""
-            }
+        # 缩略图取链接内的封面图
+        for entry in entries:
+            if entry[3]:
+                thumbnail = urljoin(base_url, entry[3]) if entry[3].startswith('/') else entry[3]
+                break
+        
+        return VideoSummary(url, video_code, title, thumbnail)
     
     def get_hot_videos(self, category: str = "daily", page: int = 1) -> dict:
         """
@@ -732,71 +940,68 @@ class Client:
             import re
             
             # 尝试多个可能的域名
-            base_urls = [
-                "https://missav.ws",
-                "https://www.missav.ws", 
-                "https://missav.com",
-                "https://www.missav.com"
-            ]
+            base_urls = list(_HOT_BASE_URLS)
             
             # 根据分类构造不同的URL路径
-            category_paths = {
-                "daily": "/dm22/en",
-                "weekly": "/dm22/en?sort=weekly",
-                "monthly": "/dm22/en?sort=monthly", 
-                "new": "/new",
-                "popular": "/popular",
-                "trending": "/trending"
-            }
-            
-            path = category_paths.get(category, "/dm22/en")
+            path = _CATEGORY_PATHS.get(category, "/dm22/en")
             
             # 添加分页参数
             if page > 1:
                 separator = "&" if "?" in path else "?"
                 path += f"{separator}page={page}"
             
-            # 尝试每个域名
-            for base_url in base_urls:
+            def build_result(base_url, content):
+                """校验并解析某个域名返回的热榜页面，成功时返回结果字典"""
+                # 检查是否是正确的MissAV页面
+                if not content or not self._is_valid_missav_page(content):
+                    return None
+                
+                # 解析热榜结果
+                results = self._parse_hot_videos(content, base_url, category)
+                if not results:
+                    return None
+                
+                self._hot_base_url = base_url
+                return {
+                    "success": True,
+                    "category": category,
+                    "page": page,
+                    "results": results,
+                    "total_count": len(results),
+                    "message": f"获取到 {len(results)} 个{self._get_category_name(category)}视频",
+                    "source": "real_data",
+                    "base_url": base_url
+                }
+            
+            # 上次成功的域名单独先试，通常一次请求即可命中
+            preferred = self._hot_base_url
+            if preferred in base_urls:
+                base_urls.remove(preferred)
                 try:
-                    hot_url = base_url + path
-                    
-                    # 使用核心的fetch方法获取热榜页面
-                    response = self.core.fetch(hot_url)
-                    
-                    # 处理响应内容
-                    if hasattr(response, 'text'):
-                        content = response.text
-                    elif isinstance(response, str):
-                        content = response
-                    else:
-                        content = str(response)
-                    
-                    if not content:
-                        continue
-                    
-                    # 检查是否是正确的MissAV页面
-                    if not self._is_valid_missav_page(content):
-                        continue
-                    
-                    # 解析热榜结果
-                    results = self._parse_hot_videos(content, base_url, category)
-                    
-                    if results:  # 如果成功提取到视频
-                        return {
-                            "success": True,
-                            "category": category,
-                            "page": page,
-                            "results": results,
-                            "total_count": len(results),
-                            "message": f"获取到 {len(results)} 个{self._get_category_name(category)}视频",
-                            "source": "real_data",
-                            "base_url": base_url
-                        }
-                        
+                    result = build_result(preferred, self._fetch(preferred + path))
+                    if result:
+                        return result
                 except Exception as e:
-                    # 记录错误但继续尝试下一个域名
-                    continue
+                    pass
+            
+            # 其余域名并发请求，按完成先后解析，第一个有效结果胜出，其余请求取消
+            executor = ThreadPoolExecutor(max_workers=len(base_urls))
+            futures = {}
+            try:
+                for base_url in base_urls:
+                    futures[executor.submit(self._fetch, base_url + path)] = base_url
+                for future in as_completed(futures):
+                    try:
+                        result = build_result(futures[future], future.result())
+                    except Exception as e:
+                        # 记录错误但继续等待其他域名
+                        continue
+                    if result:
+                        return result
+            finally:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
             
             # 所有域名都失败了
             return {
@@ -818,31 +1023,22 @@ class Client:
     
     def _is_valid_missav_page(self, content: str) -> bool:
         """检查是否是有效的MissAV页面"""
-        # 检查页面标题和内容
-        missav_indicators = [
-            "missav",
-            "MissAV", 
-            "MISSAV",
-            "JAV",
-            "Japanese Adult Video"
-        ]
-        
         content_lower = content.lower()
         
         # 如果包含ThisAV或其他不相关内容，则不是MissAV
         if "thisav" in content_lower or "ä¸çæé«®" in content:
             return False
         
-        # 检查是否包含MissAV相关内容
-        for indicator in missav_indicators:
-            if indicator.lower() in content_lower:
+        # 检查页面标题和内容是否包含MissAV相关内容
+        for indicator in _MISSAV_INDICATORS:
+            if indicator in content_lower:
                 return True
         
-        # 检查是否包含视频代码模式
-        import re
-        video_codes = re.findall(r'\b[A-Z]{2,6}-\d{2,4}\b', content)
-        if len(video_codes) > 5:  # 如果找到多个视频代码，可能是正确的页面
-            return True
+        # 检查是否包含视频代码模式，找到第6个即可判定，无需扫描整页
+        # 如果找到多个视频代码，可能是正确的页面
+        for count, _ in enumerate(_MISSAV_CODE_RE.finditer(content), 1):
+            if count > 5:
+                return True
         
         return False
     
@@ -1135,16 +1331,7 @@ class Client:
     
     def _get_sort_parameter(self, sort: str) -> str:
         """将排序选项转换为URL参数"""
-        sort_mapping = {
-            'saved': 'sort=saved',
-            'today_views': 'sort=today_views',
-            'weekly_views': 'sort=weekly_views',
-            'monthly_views': 'sort=monthly_views',
-            'views': 'sort=views',
-            'updated': 'sort=updated',
-            'released_at': 'sort=released_at'
-        }
-        return sort_mapping.get(sort, '')
+        return _SORT_PARAMS.get(sort, '')
     
     def _parse_enhanced_search_results(self, html_content: str, keyword: str, base_url: str,
                                      include_cover: bool, include_title: bool) -> list:
@@ -1166,10 +1353,11 @@ class Client:
             if include_title and video_urls:
                 real_titles = self._get_real_video_titles_batch(video_urls, max_concurrent=2)
             
-            # 为每个视频URL提取详细信息
+            # 页面只扫描一次建立 {href: 所在区块} 索引，每个视频URL只在自己的区块内提取信息
+            blocks = _index_video_blocks(html_content)
             for url in video_urls:
                 video_info = self._extract_enhanced_video_info_with_title(
-                    url, html_content, base_url, include_cover, include_title, real_titles.get(url, "")
+                    url, blocks, base_url, include_cover, include_title, real_titles.get(url, "")
                 )
                 if video_info and self._is_relevant_result(video_info, keyword):
                     results.append(video_info)
@@ -1184,7 +1372,7 @@ class Client:
         """从视频详情页获取真实标题"""
         try:
             # 使用与GetVideoInfo相同的方法获取视频标题
-            video = Video(video_url, core=self.core)
+            video = self.get_video(video_url)
             return video.title
         except Exception as e:
             # 如果获取失败，返回空字符串
@@ -1235,9 +1423,9 @@ class Client:
         
         return results
     
-    def _extract_enhanced_video_info_with_title(self, url: str, html_content: str, base_url: str,
+    def _extract_enhanced_video_info_with_title(self, url: str, blocks: dict, base_url: str,
                                               include_cover: bool, include_title: bool, real_title: str = "") -> dict:
-        """从搜索页面中提取增强的视频信息（带预获取的真实标题）"""
+        """从搜索页面的区块索引（_index_video_blocks的结果）中提取增强的视频信息（带预获取的真实标题）"""
         import re
         from urllib.parse import urljoin
         
@@ -1265,28 +1453,8 @@ class Client:
             url_path = url.replace(base_url, '')
             url_escaped = re.escape(url_path)
             
-            # 更精确地查找包含该视频信息的区域
-            video_block_patterns = [
-                rf'<(?:div|article|li|section)[^>]*>(?:[^<]|<(?!/?(?:div|article|li|section))[^>]*>)*?<a[^>]*href="{url_escaped}"[^>]*>.*?</(?:div|article|li|section)>',
-                rf'(?:<[^>]*>)*[^<]*<a[^>]*href="{url_escaped}"[^>]*>.*?(?:</[^>]*>)*',
-                rf'.{{0,500}}<a[^>]*href="{url_escaped}"[^>]*>.*?.{{0,500}}'
-            ]
-            
-            video_block = ""
-            for i, pattern in enumerate(video_block_patterns):
-                matches = re.findall(pattern, html_content, re.DOTALL | re.IGNORECASE)
-                if matches:
-                    video_block = min(matches, key=len)
-                    break
-            
-            if not video_block:
-                code_pattern = rf'.{{0,300}}{re.escape(video_code)}.{{0,300}}'
-                code_matches = re.findall(code_pattern, html_content, re.IGNORECASE)
-                if code_matches:
-                    video_block = code_matches[0]
-            
-            if not video_block:
-                video_block = html_content
+            # 页面中的链接可能是相对路径，也可能是完整URL；找不到区块时只使用默认信息
+            video_block = blocks.get(url_path) or blocks.get(url) or ""
             
             # 处理标题
             if include_title:
@@ -1573,15 +1741,7 @@ class Client:
 
     def _get_category_name(self, category: str) -> str:
         """获取分类的中文名称"""
-        category_names = {
-            "daily": "每日热门",
-            "weekly": "每周热门", 
-            "monthly": "每月热门",
-            "new": "最新",
-            "popular": "最受欢迎",
-            "trending": "趋势"
-        }
-        return category_names.get(category, "热门")
+        return _CATEGORY_NAMES.get(category, "热门")
     
     def _extract_title_from_search_page(self, video_block: str, url_escaped: str, video_code: str) -> str:
         """从搜索页面提取标题"""
@@ -693,9 +693,9 @@ def main():
     """主函数"""
     try:
         # 读取标准输入
-        input_data = sys.stdin.read().strip()
+        input_data = sys.stdin.buffer.read()
         
-        if not input_data:
+        if not input_data or input_data.isspace():
             result = {
                 "status": "error",
                 "error": "没有接收到输入数据"
@@ -13,11 +13,13 @@ import traceback
 from pathlib import Path
 
 # 确保可以导入项目内的模块
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
+current_dir = str(Path(__file__).parent)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
 
 from missav_crawl import MissAVCrawler  # 复用已有的下载器逻辑
 from progress_tracker import ProgressTracker
+from plugin_io import emit
 
 def download_task(url: str, quality: str, download_dir: str, downloader: str, tracker: ProgressTracker):
     """后台下载线程执行的函数"""
@@ -54,7 +56,7 @@ def handle_async_download(request_data: dict):
     url = request_data.get('url')
     if not url:
         # 立即返回错误给服务器
-        print(json.dumps({"status": "error", "error": "Missing url parameter."}))
+        emit({"status": "error", "error": "Missing url parameter."})
         return
 
     # 提取可选参数
@@ -81,8 +83,7 @@ def handle_async_download(request_data: dict):
             "placeholder": f"{{{{VCP_ASYNC_RESULT::MissAVCrawl::{task_id}}}}}"
         }
     }
-    print(json.dumps(initial_response))
-    sys.stdout.flush() # 确保响应被立即发送
+    emit(initial_response)  # 确保响应被立即发送
 
     # 启动后台下载线程
     tracker = ProgressTracker(plugin_name="MissAVCrawl", task_id=task_id, video_title=video_title)
@@ -97,8 +98,8 @@ def handle_async_download(request_data: dict):
 def main():
     """主函数 - 用于直接测试"""
     try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
+        input_data = sys.stdin.buffer.read()
+        if not input_data or input_data.isspace():
             print(json.dumps({"status": "error", "error": "No input data received for testing."}), file=sys.stderr)
             return
 
@@ -13,6 +13,7 @@ DEFAULT_CONFIG = {
     "MAX_RETRIES": 3,
     "RETRY_DELAY": 1,  # 秒
     "EXPONENTIAL_BACKOFF": True,
+    "TOTAL_DEADLINE": 60,  # 秒，整个重试过程的总时限，超过后不再等待重试
     
     # 超时配置
     "REQUEST_TIMEOUT": 30,  # 秒
@@ -53,6 +54,7 @@ class NetworkConfig:
             "MISSAV_RETRY_DELAY": "RETRY_DELAY",
             "MISSAV_REQUEST_TIMEOUT": "REQUEST_TIMEOUT",
             "MISSAV_CONNECT_TIMEOUT": "CONNECT_TIMEOUT",
+            "MISSAV_TOTAL_DEADLINE": "TOTAL_DEADLINE",
             "MISSAV_DEBUG_NETWORK": "DEBUG_NETWORK"
         }
         
@@ -60,7 +62,7 @@ class NetworkConfig:
             env_value = os.getenv(env_key)
             if env_value is not None:
                 # 类型转换
-                if config_key in ["MAX_RETRIES", "RETRY_DELAY", "REQUEST_TIMEOUT", "CONNECT_TIMEOUT", "POOL_CONNECTIONS", "POOL_MAXSIZE"]:
+                if config_key in ["MAX_RETRIES", "RETRY_DELAY", "REQUEST_TIMEOUT", "CONNECT_TIMEOUT", "TOTAL_DEADLINE", "POOL_CONNECTIONS", "POOL_MAXSIZE"]:
                     try:
                         self.config[config_key] = int(env_value)
                     except ValueError:
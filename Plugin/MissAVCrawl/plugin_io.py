@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAVCrawl 插件的标准输入/输出JSON辅助函数
+"""
+
+import sys
+import json
+
+# Prefer orjson for (de)serialization when available; fall back to the stdlib
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+def loads(data: bytes):
+    """Parse JSON input (orjson tolerates surrounding whitespace)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumpb(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, keeping non-ASCII characters."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def emit(obj) -> None:
+    """Write one JSON response line to stdout's byte buffer and flush it."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dumpb(obj) + b"\n")
+    sys.stdout.buffer.flush()
@@ -13,10 +13,11 @@ from typing import List, Dict, Optional
 
 # 添加当前目录到 Python 路径
 current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "missav_api_core"))
+for p in (str(current_dir), str(current_dir / "missav_api_core")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
 
-from consts import HEADERS
+from consts import HEADERS, SESSION, pick_headers
 
 
 class MissAVSearcher:
@@ -295,7 +296,7 @@ def analyze_test_video():
     test_url = "https://missav.ws/ofje-505"
     
     try:
-        response = requests.get(test_url, headers=HEADERS, timeout=30)
+        response = SESSION.get(test_url, headers=pick_headers(), timeout=30)
         response.raise_for_status()
         
         content = response.text
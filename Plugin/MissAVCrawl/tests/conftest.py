@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# 测试直接导入missav_api_core下的模块，与插件脚本的导入方式一致
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+for p in (str(PLUGIN_DIR), str(PLUGIN_DIR / "missav_api_core")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
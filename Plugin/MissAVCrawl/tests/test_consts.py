@@ -0,0 +1,88 @@
+import pytest
+
+pytest.importorskip("requests")
+
+import consts
+from consts import parse_page, parse_page_cached, evict_page
+
+PAGE = (
+    '<meta property="og:image" content="https://fourhoi.com/ssis-950/cover-n.jpg">\n'
+    '<h1 class="text-base lg:text-lg text-nord6">SSIS-950 标题 Title</h1>\n'
+    '<div><span class="font-medium">SSIS-950</span></div>\n'
+    '<time datetime="2024-01-02" class="font-medium">2024-01-02</time>\n'
+    "<script>eval(function(p){}('m3u8|abc|def|video|playlist'))</script>\n"
+)
+
+SEARCHES = {
+    "title": consts.regex_title_search,
+    "video_code": consts.regex_video_code_search,
+    "publish_date": consts.regex_publish_date_search,
+    "thumbnail": consts.regex_thumbnail_search,
+    "m3u8_js": consts.regex_m3u8_js_search,
+}
+
+
+def search_each(html):
+    """逐个字段单独search的结果，作为单次扫描的对照"""
+    out = {}
+    for name, search in SEARCHES.items():
+        m = search(html)
+        if m:
+            out[name] = m.group(1)
+    return out
+
+
+def test_parse_page_matches_per_field_search():
+    fields = parse_page(PAGE)
+    assert fields == search_each(PAGE)
+    assert fields == {
+        "title": "SSIS-950 标题 Title",
+        "video_code": "SSIS-950",
+        "publish_date": "2024-01-02",
+        "thumbnail": "https://fourhoi.com/ssis-950/",
+        "m3u8_js": "|abc|def|",
+    }
+
+
+def test_parse_page_accepts_bytes():
+    assert parse_page(PAGE.encode("utf-8")) == parse_page(PAGE)
+
+
+def test_overlapping_fields_use_first_match_each():
+    # publish_date的模式也能从video_code的位置开始尝试，两个字段各自取首个匹配
+    html = (
+        '<span class="font-medium">ABC-123</span>'
+        '<time class="font-medium">2023-05-06</time>'
+        '<span class="font-medium">XYZ-999</span>'
+    )
+    fields = parse_page(html)
+    assert fields == search_each(html)
+    assert fields["video_code"] == "ABC-123"
+    assert fields["publish_date"] == "2023-05-06"
+
+
+def test_values_do_not_span_lines():
+    html = (
+        '<h1 class="text-base lg:text-lg text-nord6">broken\ntitle</h1>\n'
+        '<h1 class="text-base lg:text-lg text-nord6">real title</h1>\n'
+    )
+    assert parse_page(html)["title"] == "real title"
+    assert search_each(html)["title"] == "real title"
+
+
+def test_m3u8_delimiters_across_lines_fall_back_to_regex():
+    html = "'m3u8|first\nvideo 'm3u8|second|video"
+    assert parse_page(html)["m3u8_js"] == search_each(html)["m3u8_js"] == "|second|"
+
+
+def test_missing_fields_are_omitted():
+    assert parse_page("<html><body>nothing here</body></html>") == {}
+
+
+def test_parse_page_cached_returns_independent_copies():
+    html = PAGE + "<!-- cached -->"
+    first = parse_page_cached(html)
+    first["title"] = "changed"
+    assert parse_page_cached(html) == parse_page(html)
+    evict_page(html)
+    assert consts._page_key(html) not in consts._page_cache